@@ -1,8 +1,14 @@
-from primitives.graph import GraphGenerator, Graph
+from primitives.graph import GraphGenerator, GraphTopology, Graph
+from primitives.importing import import_graph
 from primitives.metrics.paths import get_shortest_path
-from .utils import Logger
+from primitives.metrics.landmarks import LandmarkIndex
+from primitives.metrics.hierarchy import ContractionHierarchy
+from primitives.metrics.allpairs import AllPairsShortestPaths
+from .utils import Logger, EvaluationError
 from .objects import SurveillanceObject, generate_average_speeds
-from .dispatching import SurveillanceObjectDispatcher
+from .population import ObjectPopulation
+from .dispatching import SurveillanceObjectDispatcher, RoutingType
+from .scheduling import EventScheduler, SchedulingType
 from .tasking import TaskGenerator
 from .transition import TransitionGenerator, TransitionType, GroupType
 from .surveillance import BaseSurveillanceSystem as SimpleSystem
@@ -19,13 +25,18 @@ class Experiment:
     self.__train_time_limit = 10000
     self.__inference_time_limit = 100
     self.__time_step = 1
+    self.__scheduling = SchedulingType.FIXED_STEP
     self.__logger = Logger("Main")
 
     self.__base_domain_graph_size = 3
     self.__base_domain_graph_min_distance = 20
     self.__base_domain_graph_max_distance = 100
+    self.__base_domain_graph_topology = GraphTopology.RANDOM
+    self.__base_domain_graph_file = None
+    self.__routing = RoutingType.DIJKSTRA
 
     self.__objects_count = 1
+    self.__vectorized_objects = False
     self.__object_speed_exp = 10
     self.__motion_probability = .5
 
@@ -46,12 +57,17 @@ class Experiment:
     print("Timetick step:", self.__time_step)
     print("Timetick training limit:", self.__train_time_limit)
     print("Timetick inference limit:", self.__inference_time_limit)
+    print("Scheduling:", self.__scheduling)
     print("-----------------------------")
     print("Domain graph size:", self.__base_domain_graph_size)
     print("Domain graph min distance:", self.__base_domain_graph_min_distance)
     print("Domain graph max distance:", self.__base_domain_graph_max_distance)
+    print("Domain graph topology:", self.__base_domain_graph_topology)
+    print("Domain graph file:", self.__base_domain_graph_file)
+    print("Domain graph routing:", self.__routing)
     print("-----------------------------")
     print("Objects count:", self.__objects_count)
+    print("Objects vectorized:", self.__vectorized_objects)
     print("Objects motion degree:", self.__motion_probability)
     print("Objects speed expectation:", self.__object_speed_exp)
     print("-----------------------------")
@@ -64,16 +80,50 @@ class Experiment:
     print("-----------------------------")
 
 
+  def __generate_domain_graph(self):
+    if self.__base_domain_graph_file is not None:
+      graph, _ = import_graph(self.__base_domain_graph_file)
+      self.__base_domain_graph_size = graph.size
+      return graph
+
+    size = self.__base_domain_graph_size
+    min_weight = self.__base_domain_graph_min_distance
+    max_weight = self.__base_domain_graph_max_distance
+
+    if self.__base_domain_graph_topology == GraphTopology.GRID:
+      return GraphGenerator.create_grid(size, min_weight=min_weight, max_weight=max_weight)
+    elif self.__base_domain_graph_topology == GraphTopology.GEOMETRIC:
+      return GraphGenerator.create_geometric(size, min_weight=min_weight, max_weight=max_weight)
+    elif self.__base_domain_graph_topology == GraphTopology.PREFERENTIAL:
+      return GraphGenerator.create_preferential(size, min_weight=min_weight, max_weight=max_weight)
+    else:
+      return GraphGenerator.create(size, min_weight=min_weight, max_weight=max_weight)
+
+
+  def __create_router(self):
+    if self.__routing == RoutingType.LANDMARKS:
+      return LandmarkIndex(self.__domain_graph)
+    elif self.__routing == RoutingType.HIERARCHY:
+      return ContractionHierarchy(self.__domain_graph)
+    elif self.__routing == RoutingType.ALL_PAIRS:
+      router = AllPairsShortestPaths.build(self.__domain_graph)
+      router.save_to_file(filename=f"{experiment_root_path}/domain_paths.npz")
+      self.__logger.info("All pairs paths saved to", f"{experiment_root_path}/domain_paths.npz")
+      return router
+    else:
+      return None
+
+
   def __setup_conditions(self):
     self.__logger.info("Setting up environment")
 
     # Generating base domain graph
-    self.__domain_graph = GraphGenerator.create(self.__base_domain_graph_size, min_weight=self.__base_domain_graph_min_distance, max_weight=self.__base_domain_graph_max_distance)
+    self.__domain_graph = self.__generate_domain_graph()
 
     self.__logger.info("General domain graph generated.")
     self.__logger.info(self.__domain_graph)
-    self.__domain_graph.save_to_file(filename=f"{experiment_root_path}/domain_graph.pkl")
-    self.__logger.info("Graph file saved to", f"{experiment_root_path}/domain_graph.pkl")
+    self.__domain_graph.save_to_file(filename=f"{experiment_root_path}/domain_graph.bin", binary=True)
+    self.__logger.info("Graph file saved to", f"{experiment_root_path}/domain_graph.bin")
 
 
     # Generating transition matrices for objects
@@ -83,7 +133,8 @@ class Experiment:
     self.__logger.info("Transition matrices generated", transition_matrices)
 
     # Creating auxilary object dispatcher  
-    dispatcher = SurveillanceObjectDispatcher(self.__domain_graph, transitions=transition_matrices, objects_count=self.__objects_count)
+    router = self.__create_router()
+    dispatcher = SurveillanceObjectDispatcher(self.__domain_graph, transitions=transition_matrices, objects_count=self.__objects_count, router=router)
     dispatcher.reset()
     self.__movement_dispatcher = dispatcher
   
@@ -93,27 +144,41 @@ class Experiment:
 
 
     # Initializing surveillance objects
-    self.__surveillance_objects = [ SurveillanceObject(dispatcher, id=idx, average_speed=average_speeds[idx], time_step=self.__time_step) for idx in range(0, self.__objects_count) ]
-    for s_object in self.__surveillance_objects:
-      start_domain_id = s_object.coordinates.domain
-      dispatcher.on_domain_enter(s_object.snapshot, start_domain_id, self.__timetick)
+    if self.__vectorized_objects:
+      if self.__scheduling == SchedulingType.EVENTS:
+        raise EvaluationError("Event scheduling is not supported for vectorized objects")
+
+      self.__surveillance_objects = []
+      self.__population = ObjectPopulation(dispatcher, average_speeds, time_step=self.__time_step)
+      self.__population.enter_start_domains(self.__timetick)
+      object_ids = self.__population.ids
+    else:
+      self.__population = None
+      self.__surveillance_objects = [ SurveillanceObject(dispatcher, id=idx, average_speed=average_speeds[idx], time_step=self.__time_step) for idx in range(0, self.__objects_count) ]
+      for s_object in self.__surveillance_objects:
+        start_domain_id = s_object.coordinates.domain
+        dispatcher.on_domain_enter(s_object.snapshot, start_domain_id, self.__timetick)
+      object_ids = [ obj.id for obj in self.__surveillance_objects ]
 
     # Setting up a reference surveillance model
-    supervised_object_ids = [ obj.id for obj in self.__surveillance_objects ][: self.__surveillance_target_count]
+    supervised_object_ids = object_ids[: self.__surveillance_target_count]
 
-    self.__reference_surveillance = SimpleSystem(self.__domain_graph, supervised_object_ids=supervised_object_ids, alpha=self.__surveillance_nodes_ratio)
-    self.__surveillance = AdvancedSystem(self.__domain_graph, supervised_object_ids=supervised_object_ids, alpha=self.__surveillance_nodes_ratio)
+    self.__reference_surveillance = SimpleSystem(self.__domain_graph, dispatcher.occupancy, supervised_object_ids=supervised_object_ids, alpha=self.__surveillance_nodes_ratio)
+    self.__surveillance = AdvancedSystem(self.__domain_graph, dispatcher.occupancy, supervised_object_ids=supervised_object_ids, alpha=self.__surveillance_nodes_ratio)
 
 
   def train(self):
     self.__timetick = 0
     self.__surveillance.set_training_mode(True)
-    
+
+    if self.__scheduling == SchedulingType.EVENTS:
+      scheduler = EventScheduler(self.__surveillance_objects, time_step=self.__time_step)
+      self.__timetick = scheduler.run([ self.__surveillance ], self.__timetick, self.__train_time_limit)
+
     while self.__timetick < self.__train_time_limit:
       self.__surveillance.on_timetick(self.__timetick)
 
-      for surveillance_object in self.__surveillance_objects:
-        surveillance_object.on_timetick(self.__timetick)
+      self.__objects_on_timetick(self.__timetick)
 
       self.__timetick += self.__time_step
       #time.sleep(.5)
@@ -122,6 +187,14 @@ class Experiment:
     print('\n----------')
 
 
+  def __objects_on_timetick(self, timetick):
+    if self.__population is not None:
+      self.__population.on_timetick(timetick)
+
+    for surveillance_object in self.__surveillance_objects:
+      surveillance_object.on_timetick(timetick)
+
+
   def reset_objects_positions(self):
     self.__timetick = 0
 
@@ -133,17 +206,24 @@ class Experiment:
       start_domain_id = s_object.coordinates.domain
       self.__movement_dispatcher.on_domain_enter(s_object.snapshot, start_domain_id, self.__timetick)
 
+    if self.__population is not None:
+      self.__population.reset_state(0)
+      self.__population.enter_start_domains(self.__timetick)
+
 
   def inference(self):
 
     self.__surveillance.set_training_mode(False)
 
+    if self.__scheduling == SchedulingType.EVENTS:
+      scheduler = EventScheduler(self.__surveillance_objects, time_step=self.__time_step)
+      self.__timetick = scheduler.run([ self.__surveillance, self.__reference_surveillance ], self.__timetick, self.__inference_time_limit)
+
     while self.__timetick < self.__inference_time_limit:
       self.__surveillance.on_timetick(self.__timetick)
       self.__reference_surveillance.on_timetick(self.__timetick)
 
-      for surveillance_object in self.__surveillance_objects:
-        surveillance_object.on_timetick(self.__timetick)
+      self.__objects_on_timetick(self.__timetick)
 
       self.__timetick += self.__time_step
 
@@ -1,4 +1,6 @@
 class Coordinates:
+  __slots__ = ('domain', 'offset')
+
   def __init__(self, domain = 0, offset = 0):
     self.domain = domain
     self.offset = offset
@@ -7,4 +9,11 @@ class Coordinates:
     return self.domain == other.domain and self.offset == other.offset
 
   def get(self):
-    return self.domain, self.offset
\ No newline at end of file
+    return self.domain, self.offset
+
+  def set(self, domain, offset = 0):
+    self.domain = domain
+    self.offset = offset
+
+  def copy(self):
+    return Coordinates(self.domain, self.offset)
@@ -1,10 +1,21 @@
 from .utils import Logger, EvaluationError
 from .tasking import TaskGenerator, TaskType
 from .coordinate import Coordinates
-from primitives.metrics.paths import get_shortest_path
-import copy
+from primitives.metrics.paths import get_shortest_path, ShortestPathTreeCache
+from primitives.properties import NodePropertyMap
+from enum import Enum
+import numpy as np
+
+
+class RoutingType(Enum):
+  DIJKSTRA = 0
+  LANDMARKS = 1
+  HIERARCHY = 2
+  ALL_PAIRS = 3
 
 class DispatchingInfo:
+  __slots__ = ('__id', '__coordinates')
+
   def __init__(self, id, coordinates):
     self.__id = id
     self.__coordinates = coordinates
@@ -22,22 +33,140 @@ class DispatchingInfo:
 
 
 
+# Which objects are in which domain. Guests of a domain are kept in an
+# insertion ordered dict used as a set, frames are read-only views of it.
+# Every change of a domain bumps its version, so readers can skip domains
+# that did not change since they last looked. Subscribers of a domain get
+# each change pushed as on_guest_enter / on_guest_leave(object_id). Objects
+# get dense slots on their first enter and the domain of every slot is also
+# kept in an array, so domains of many objects are looked up at once.
+class DomainOccupancy:
+  def __init__(self, graph):
+    self.__graph = graph
+    self.__guests = { node.id: dict() for node in graph }
+    self.__slots = dict()
+    self.__domains = np.full(0, -1, dtype=np.int64)
+    self.__versions = NodePropertyMap(graph, dtype=np.int64)
+    self.__subscribers = dict()
+
+  def reset(self):
+    for domain_id, subscribers in self.__subscribers.items():
+      for object_id in self.__guests[domain_id]:
+        for subscriber in subscribers:
+          subscriber.on_guest_leave(object_id)
+
+    for guests in self.__guests.values():
+      guests.clear()
+    self.__domains.fill(-1)
+    self.__versions.values[:] += 1
+
+  def subscribe(self, domain_id, subscriber):
+    self.__check(domain_id)
+    self.__subscribers.setdefault(domain_id, []).append(subscriber)
+
+  def unsubscribe(self, domain_id, subscriber):
+    subscribers = self.__subscribers.get(domain_id, [])
+    if subscriber in subscribers:
+      subscribers.remove(subscriber)
+
+  def __check(self, domain_id):
+    if domain_id not in self.__guests:
+      raise EvaluationError(f"Domain {domain_id} does not belong to the domain graph")
+
+  def __slot(self, object_id):
+    slot = self.__slots.get(object_id)
+    if slot is None:
+      slot = len(self.__slots)
+      self.__slots[object_id] = slot
+
+      if slot >= len(self.__domains):
+        domains = np.full(max(2 * len(self.__domains), slot + 1), -1, dtype=np.int64)
+        domains[:len(self.__domains)] = self.__domains
+        self.__domains = domains
+
+    return slot
+
+  def enter(self, object_id, domain_id):
+    self.__check(domain_id)
+    slot = self.__slot(object_id)
+    self.__guests[domain_id][object_id] = None
+    self.__domains[slot] = domain_id
+    self.__versions.values[domain_id] += 1
+
+    for subscriber in self.__subscribers.get(domain_id, ()):
+      subscriber.on_guest_enter(object_id)
+
+  def leave(self, object_id, domain_id):
+    self.__check(domain_id)
+    if object_id in self.__guests[domain_id]:
+      del self.__guests[domain_id][object_id]
+      self.__versions.values[domain_id] += 1
+      slot = self.__slots[object_id]
+      if self.__domains[slot] == domain_id:
+        self.__domains[slot] = -1
+
+      for subscriber in self.__subscribers.get(domain_id, ()):
+        subscriber.on_guest_leave(object_id)
+
+  # Objects in transit are not in any domain
+  def domain_of(self, object_id):
+    domain_id = self.domains_of([ object_id ])[0]
+    return None if domain_id < 0 else domain_id.item()
+
+  # Domain of each of `object_ids`, -1 for objects in transit or never seen
+  def domains_of(self, object_ids):
+    slots = np.fromiter((self.__slots.get(object_id, -1) for object_id in object_ids), dtype=np.int64, count=len(object_ids))
+    known = slots >= 0
+
+    result = np.full(len(slots), -1, dtype=np.int64)
+    result[known] = self.__domains[slots[known]]
+    return result
+
+  def frame(self, domain_id):
+    self.__check(domain_id)
+    return self.__guests[domain_id].keys()
+
+  def count(self, domain_id):
+    self.__check(domain_id)
+    return len(self.__guests[domain_id])
+
+  def version(self, domain_id):
+    self.__check(domain_id)
+    return self.__versions.values[domain_id].item()
+
+  @property
+  def versions(self):
+    return self.__versions.values
+
+
+
 class SurveillanceObjectDispatcher:
 
-  def __init__(self, graph, objects_count, transitions, moving_degree=0.5, max_await=10):
+  def __init__(self, graph, objects_count, transitions, moving_degree=0.5, max_await=10, router=None, route_cache_size=32, seed=None):
     self.__graph = graph
-    self.__generator = TaskGenerator(graph, transitions, moving_degree=moving_degree, max_await=max_await)
+    self.__router = router
+    self.__route_cache = ShortestPathTreeCache(graph, capacity=route_cache_size) if router is None and route_cache_size > 0 else None
+    self.__generator = TaskGenerator(graph, transitions, moving_degree=moving_degree, max_await=max_await, seed=seed)
     self.__timetick = 0
     self.__logger = Logger('Global_Movement_Dispatcher')
     self.__objects_count = objects_count
 
     self.__history = { x: [] for x in range(objects_count) }
-    self.__move_target_counters = { n.id : 0 for n in graph.nodes }
+    self.__move_target_counters = NodePropertyMap(graph, dtype=np.int64)
+    self.__occupancy = DomainOccupancy(graph)
 
   @property
   def history(self):
     return self.__history
 
+  @property
+  def route_cache(self):
+    return self.__route_cache
+
+  @property
+  def occupancy(self):
+    return self.__occupancy
+
 
   def get_history_formatted(self):
     return "".join([ f"{x}: {self.__history[x]}\n" for x in self.__history.keys() ])
@@ -45,18 +174,19 @@ class SurveillanceObjectDispatcher:
 
   def reset(self):
     self.__history = { x: [] for x in range(self.__objects_count) }
-    for node in self.__graph.nodes:
-      node.attribute['guests'] = []
+    self.__occupancy.reset()
 
 
   def on_end_of_time(self):
-    self.__logger.info("Statisitcs.", "Move task targets:", self.__move_target_counters)
+    self.__logger.info("Statisitcs.", "Move task targets:", self.__move_target_counters.to_dict())
+    if self.__route_cache is not None:
+      self.__logger.info("Statisitcs.", "Route cache hits:", self.__route_cache.hits, "misses:", self.__route_cache.misses)
 
 
   def __find_path(self, src_coordinates, dest_coordinates):
     src_id = src_coordinates.domain
     dest_id = dest_coordinates.domain
-    return get_shortest_path(self.__graph, src_id, dest_id)
+    return get_shortest_path(self.__graph, src_id, dest_id, index=self.__router if self.__router is not None else self.__route_cache)
 
 
   def get_route(self, src_coordinates, dest_coordinates):
@@ -73,24 +203,39 @@ class SurveillanceObjectDispatcher:
     return task
 
 
+  def __leave(self, object_id, domain_id):
+    self.__occupancy.leave(object_id, domain_id)
+
+
+  def __enter(self, object_id, domain_id, timetick):
+    self.__history[object_id].append((domain_id, timetick))
+    self.__occupancy.enter(object_id, domain_id)
+
+
   def on_domain_leave(self, object_snapshot, domain_id, timetick):
     self.__logger.info(f"Object #{object_snapshot.id} left domain:", domain_id, f"Timetick: {timetick}")
-    node = self.__graph.get_node(domain_id)
-    
-    if 'guests' in node.attribute.keys():
-      if object_snapshot.id in node.attribute['guests']:
-        node.attribute['guests'].remove(object_snapshot.id)
-    else:
-      node.attribute['guests'] = []
+    self.__leave(object_snapshot.id, domain_id)
 
 
   def on_domain_enter(self, object_snapshot, domain_id, timetick):
     self.__logger.info(f"Object #{object_snapshot.id} entered domain:", domain_id, f"Timetick: {timetick}")
-    node = self.__graph.get_node(domain_id)
+    self.__enter(object_snapshot.id, domain_id, timetick)
+
+
+  # Bulk variants for object populations, one (object id, domain id) pair per event
+  def on_domains_leave(self, object_ids, domain_ids, timetick):
+    if len(object_ids) == 0:
+      return
+
+    self.__logger.info("Objects left domains:", list(zip(object_ids, domain_ids)), f"Timetick: {timetick}")
+    for object_id, domain_id in zip(object_ids, domain_ids):
+      self.__leave(object_id, domain_id)
+
 
-    self.__history[object_snapshot.id].append((domain_id, timetick))
+  def on_domains_enter(self, object_ids, domain_ids, timetick):
+    if len(object_ids) == 0:
+      return
 
-    if 'guests' in node.attribute.keys():
-      node.attribute['guests'].append(object_snapshot.id)
-    else:
-      node.attribute['guests'] = [ object_snapshot.id ]
\ No newline at end of file
+    self.__logger.info("Objects entered domains:", list(zip(object_ids, domain_ids)), f"Timetick: {timetick}")
+    for object_id, domain_id in zip(object_ids, domain_ids):
+      self.__enter(object_id, domain_id, timetick)
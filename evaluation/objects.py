@@ -5,7 +5,8 @@ from .tasking import TaskStack, TaskType
 from .dispatching import SurveillanceObjectDispatcher, DispatchingInfo
 from .coordinate import Coordinates
 from numpy import random
-import copy
+import numpy as np
+import math
 
 class State(Enum):
   IDLE = 0,
@@ -37,9 +38,11 @@ class SurveillanceObject:
   def reset_state(self, start_domain):
     self.__task_stack = TaskStack()
     self.__coordinates = Coordinates(start_domain)
+    self.__snapshot = DispatchingInfo(self.__id, self.__coordinates)
     self.__state = State.IDLE
     self.__route = None
     self.__speed = 0
+    self.__edge_ticks = 0
 
   @property
   def id(self):
@@ -53,9 +56,10 @@ class SurveillanceObject:
   def coordinates(self):
     return self.__coordinates
   
+  # The snapshot and the coordinates are updated in place, copy them to keep
   @property
   def snapshot(self):
-    return DispatchingInfo(self.__id, self.__coordinates)
+    return self.__snapshot
 
   def __on_task_changed(self, timetick):
     if self.current_task is None:
@@ -98,7 +102,7 @@ class SurveillanceObject:
 
   
   def __process_wait(self):
-    return copy.deepcopy(self.__coordinates)
+    return self.__coordinates
 
 
   def __process_move(self, timetick):
@@ -115,14 +119,62 @@ class SurveillanceObject:
       self.__dispatcher.on_domain_leave(self.snapshot, current_domain, timetick)
       self.__logger.info(f'Estimated distance to domain {target_node.id}:', distance)
 
-    next_offset = current_offset + (self.__speed * self.__time_step)
+    # the offset along an edge is a multiple of the step, so the arrival can
+    # be computed up front instead of summing ticks
+    self.__edge_ticks = 1 if current_offset == 0 else self.__edge_ticks + 1
+    next_offset = self.__edge_ticks * (self.__speed * self.__time_step)
 
     if next_offset >= distance:
       next_domain = target_node.id
       self.__on_domain_reached(next_domain, timetick)
-      return Coordinates(next_domain, 0)
+      self.__coordinates.set(next_domain, 0)
     else:
-      return Coordinates(current_domain, next_offset)      
+      self.__coordinates.set(current_domain, next_offset)
+
+    return self.__coordinates
+
+
+  # Earliest moment not before `timetick` at which on_timetick does more than
+  # move the object along its current edge: a task is taken or completed, a
+  # domain is left or reached. The ticks in between can be skipped.
+  def next_event_timetick(self, timetick):
+    task = self.current_task
+    if task is None:
+      return timetick
+
+    if self.__state == State.IDLE:
+      return max(timetick, task.completed_timetick) if task.category == TaskType.WAIT else timetick
+
+    current_offset = self.__coordinates.offset
+    if len(self.__route) <= 1 or current_offset == 0:
+      return timetick
+
+    distance = self.__route[0].get_weight(self.__route[1].id)
+    return timetick + (self.__arrival_ticks(distance) - self.__edge_ticks - 1) * self.__time_step
+
+  # Number of steps taken along the current edge when it is completed
+  def __arrival_ticks(self, distance):
+    step = self.__speed * self.__time_step
+    ticks = max(1, math.ceil(float(np.squeeze(distance / step))))
+    # the division may round across the boundary, settle on the comparison
+    # __process_move makes
+    while ticks > 1 and (ticks - 1) * step >= distance:
+      ticks -= 1
+    while not ticks * step >= distance:
+      ticks += 1
+    return ticks
+
+  # Applies `count` ticks that are known to be quiet, see next_event_timetick
+  def skip_timeticks(self, count):
+    if self.__state != State.MOVING or count <= 0 or len(self.__route) <= 1:
+      return
+
+    current_domain, current_offset = self.__coordinates.get()
+    if current_offset == 0:
+      raise EvaluationError("Cannot skip the departure from a domain")
+
+    self.__edge_ticks += count
+    self.__coordinates.set(current_domain, self.__edge_ticks * (self.__speed * self.__time_step))
 
 
   def on_timetick(self, timetick):
@@ -0,0 +1,161 @@
+from .utils import EvaluationError, Logger
+from .tasking import TaskType
+from .dispatching import DispatchingInfo
+from .coordinate import Coordinates
+import numpy as np
+
+_NO_TASK = -1
+
+
+# Struct of arrays counterpart of a list of SurveillanceObject: the state of
+# every object (domain, offset, speed, next hop, task type and deadline) lives
+# in numpy arrays indexed by a dense slot, object ids are mapped to slots. All
+# moving objects are advanced by one vectorized step per tick and domain
+# enter/leave events are passed to the dispatcher in bulk. Tasks are still
+# drawn one by one in slot order, so histories match the per object model.
+class ObjectPopulation:
+  def __init__(self, dispatcher, average_speeds, ids=None, start_domain=0, time_step=1):
+    size = len(average_speeds)
+    self.__ids = list(range(size)) if ids is None else list(ids)
+    self.__slots = { object_id: slot for slot, object_id in enumerate(self.__ids) }
+
+    if len(self.__ids) != size or len(self.__slots) != size:
+      raise EvaluationError("Object ids should be unique and match the speeds")
+
+    self.__dispatcher = dispatcher
+    self.__time_step = time_step
+    self.__average_speed = np.asarray(average_speeds, dtype=np.float64).reshape(size)
+    self.__logger = Logger("Object_Population")
+
+    self.reset_state(start_domain)
+    self.__logger.info(f"Population of {size} objects created")
+
+  def reset_state(self, start_domain=0):
+    size = len(self.__ids)
+    self.__domain = np.full(size, start_domain, dtype=np.int64)
+    self.__offset = np.zeros(size, dtype=np.float64)
+    self.__edge_ticks = np.zeros(size, dtype=np.int64)
+    self.__moving = np.zeros(size, dtype=bool)
+    self.__task = np.full(size, _NO_TASK, dtype=np.int8)
+    self.__deadline = np.full(size, np.inf, dtype=np.float64)
+    self.__destination = np.full(size, -1, dtype=np.int64)
+    self.__next_hop = np.full(size, -1, dtype=np.int64)
+    self.__distance = np.zeros(size, dtype=np.float64)
+    self.__routes = [ None ] * size
+    self.__route_position = np.zeros(size, dtype=np.int64)
+
+  @property
+  def ids(self):
+    return self.__ids
+
+  @property
+  def size(self):
+    return len(self.__ids)
+
+  @property
+  def domains(self):
+    return self.__domain
+
+  @property
+  def offsets(self):
+    return self.__offset
+
+  def slot(self, object_id):
+    if object_id not in self.__slots:
+      raise EvaluationError(f"Object #{object_id} does not belong to the population")
+    return self.__slots[object_id]
+
+  def coordinates(self, object_id):
+    return self.__coordinates(self.slot(object_id))
+
+  def snapshot(self, object_id):
+    return DispatchingInfo(object_id, self.coordinates(object_id))
+
+  def __coordinates(self, slot):
+    return Coordinates(int(self.__domain[slot]), self.__offset[slot].item())
+
+  def enter_start_domains(self, timetick):
+    self.__dispatcher.on_domains_enter(self.__ids, self.__domain.tolist(), timetick)
+
+
+  def __set_next_hop(self, slot):
+    route = self.__routes[slot]
+    position = self.__route_position[slot]
+
+    if route is not None and position + 1 < len(route):
+      self.__next_hop[slot] = route[position + 1].id
+      self.__distance[slot] = route[position].get_weight(route[position + 1].id)
+    else:
+      self.__next_hop[slot] = -1
+
+  def __assign_task(self, slot, timetick):
+    coordinates = self.__coordinates(slot)
+    task = self.__dispatcher.get_task(DispatchingInfo(self.__ids[slot], coordinates), timetick)
+    if task is None:
+      raise EvaluationError("Task cannot be none")
+
+    self.__task[slot] = task.category.value
+    self.__routes[slot] = None
+    self.__route_position[slot] = 0
+
+    if task.category == TaskType.WAIT:
+      self.__moving[slot] = False
+      self.__deadline[slot] = task.completed_timetick
+      self.__destination[slot] = -1
+    else:
+      self.__moving[slot] = True
+      self.__deadline[slot] = np.inf
+      self.__destination[slot] = task.destination.domain
+      self.__routes[slot], _ = self.__dispatcher.get_route(coordinates, task.destination)
+
+    self.__set_next_hop(slot)
+
+
+  def __move(self, slots, timetick):
+    slots = slots[self.__next_hop[slots] >= 0]
+    if len(slots) == 0:
+      return
+
+    offsets = self.__offset[slots]
+    departing = slots[offsets == 0]
+    self.__dispatcher.on_domains_leave([ self.__ids[slot] for slot in departing.tolist() ], self.__domain[departing].tolist(), timetick)
+
+    # offsets are whole steps along the edge, as for SurveillanceObject
+    edge_ticks = np.where(offsets == 0, 1, self.__edge_ticks[slots] + 1)
+    self.__edge_ticks[slots] = edge_ticks
+    next_offsets = edge_ticks * (self.__average_speed[slots] * self.__time_step)
+    arrived = next_offsets >= self.__distance[slots]
+    self.__offset[slots] = np.where(arrived, 0, next_offsets)
+
+    arrived = slots[arrived]
+    self.__domain[arrived] = self.__next_hop[arrived]
+    self.__route_position[arrived] += 1
+    for slot in arrived.tolist():
+      self.__set_next_hop(slot)
+
+    self.__dispatcher.on_domains_enter([ self.__ids[slot] for slot in arrived.tolist() ], self.__domain[arrived].tolist(), timetick)
+
+  def __completed(self, slots, timetick):
+    task = self.__task[slots]
+    waited = (task == TaskType.WAIT.value) & (timetick >= self.__deadline[slots])
+    reached = (task == TaskType.MOVE.value) & (self.__domain[slots] == self.__destination[slots]) & (self.__offset[slots] == 0)
+    return slots[waited | reached]
+
+  def __advance(self, slots, timetick):
+    for slot in slots[self.__task[slots] == _NO_TASK].tolist():
+      self.__assign_task(slot, timetick)
+
+    self.__move(slots[self.__moving[slots]], timetick)
+
+    for slot in self.__completed(slots, timetick).tolist():
+      self.__assign_task(slot, timetick)
+
+
+  def on_timetick(self, timetick):
+    # first tasks are taken and may complete within the same tick, objects
+    # are then stepped one by one to keep the order of task draws
+    if (self.__task == _NO_TASK).any():
+      for slot in range(len(self.__ids)):
+        self.__advance(np.asarray([ slot ]), timetick)
+    else:
+      self.__advance(np.arange(len(self.__ids)), timetick)
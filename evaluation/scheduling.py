@@ -0,0 +1,73 @@
+from enum import Enum
+import heapq
+import math
+
+
+class SchedulingType(Enum):
+  FIXED_STEP = 0
+  EVENTS = 1
+
+
+# Event driven replacement of the fixed step loops of Experiment. Objects are
+# queued by the moment of their next event (task completion, domain leave or
+# arrival) and surveillance systems report their node activation times; the
+# clock jumps from one such tick to the next. Ticks following an event are
+# always run in full since frames may have changed, the quiet ticks in
+# between are applied in bulk. Histories match the fixed step loop.
+class EventScheduler:
+  def __init__(self, objects, time_step=1):
+    self.__objects = objects
+    self.__time_step = time_step
+
+  # First tick of the time step grid starting at `timetick` that is not
+  # earlier than `moment`
+  def __align(self, timetick, moment):
+    if moment <= timetick:
+      return timetick
+    if math.isinf(moment):
+      return moment
+    return timetick + math.ceil((moment - timetick) / self.__time_step) * self.__time_step
+
+  def __ticks_between(self, start, stop):
+    return round((stop - start) / self.__time_step)
+
+  def run(self, systems, timetick, time_limit):
+    step = self.__time_step
+    processed = [ timetick - step ] * len(self.__objects)
+    queue = [ (timetick, idx) for idx in range(len(self.__objects)) ]
+    heapq.heapify(queue)
+
+    while timetick < time_limit:
+      changed = any(system.next_event_timetick(timetick) <= timetick for system in systems)
+      for system in systems:
+        system.on_timetick(timetick)
+
+      while len(queue) > 0 and queue[0][0] <= timetick:
+        _, idx = heapq.heappop(queue)
+        surveillance_object = self.__objects[idx]
+
+        surveillance_object.skip_timeticks(self.__ticks_between(processed[idx], timetick) - 1)
+        surveillance_object.on_timetick(timetick)
+        processed[idx] = timetick
+        heapq.heappush(queue, (self.__align(timetick + step, surveillance_object.next_event_timetick(timetick + step)), idx))
+        changed = True
+
+      next_timetick = timetick + step
+      # systems are asked again after the tick: nodes activated during it
+      # report the next tick as their event
+      if not changed:
+        moments = [ queue[0][0] if len(queue) > 0 else math.inf ] + [ system.next_event_timetick(next_timetick) for system in systems ]
+        next_timetick = min(self.__align(next_timetick, min(moments)), self.__align(next_timetick, time_limit))
+
+      skipped = [ timetick + step * n for n in range(1, self.__ticks_between(timetick, next_timetick)) ]
+      if len(skipped) > 0:
+        for system in systems:
+          system.skip_timeticks(skipped)
+
+      timetick = next_timetick
+
+    # leave every object in the state the fixed step loop would end with
+    for idx, surveillance_object in enumerate(self.__objects):
+      surveillance_object.skip_timeticks(self.__ticks_between(processed[idx], timetick) - 1)
+
+    return timetick
@@ -1,9 +1,9 @@
 import random
 import math
-import copy
 from primitives.metrics.paths import find_paths, get_shortest_of_paths
 from primitives.graph import Graph, GraphNode
 from .utils import Logger
+import numpy as np
 
 class SurveillanceError(Exception):
   def __init__(self, message):
@@ -16,41 +16,58 @@ class SimpleSurveillanceNode(GraphNode):
     self._dispatcher = dispatcher
     self._active = True
     self._frames_processed = 0
+    self.__observed_domain = None
+    self.__occupancy = None
 
 
-  def set_observed_domain(self, domain_obj):
+  def set_observed_domain(self, domain_obj, occupancy):
     self.__observed_domain = domain_obj
+    self.__occupancy = occupancy
 
   @property
   def observed_domain(self):
     return self.__observed_domain
 
+  @property
+  def occupancy(self):
+    return self.__occupancy
+
+  # Read-only view of the guests of the observed domain, it follows the
+  # domain as objects come and go
   def get_frame_content(self):
-    observed_domain = self.__observed_domain
-    frame_content = observed_domain.attribute['guests']
-    return copy.copy(frame_content)
+    return self.__occupancy.frame(self.__observed_domain.id)
 
   @property
   def resource_statistic(self):
     return { "Frames processed": self._frames_processed }
 
+  @property
+  def active(self):
+    return self._active
+
+  # Frames of this node matched by the surveillance dispatcher in a batch
+  def count_frames(self, count=1):
+    self._frames_processed += count
+
 
   def distance_to(self, adjacent_node_id):
     return self.get_weight(adjacent_node_id)
 
 
+  # Single node form of the batch the system processes every tick
   def on_timetick(self, timetick):
     if self._active:
-      frame_content = self.get_frame_content()
-      self._frames_processed += 1
-      self._dispatcher.on_process_frame((self.id, self.observed_domain.id), timetick, frame_content)
+      self.count_frames()
+      self._dispatcher.on_process_all_frames([ (self.id, self.observed_domain.id) ], [ timetick ])
 
 
 
 class SurveillanceDispatcher:
-  def __init__(self, targets):
+  def __init__(self, targets, occupancy=None):
     self._logger = Logger("Surveillance dispatcher")
     self._targets = targets
+    self._target_set = set(targets)
+    self._occupancy = occupancy
     self._node_statistics = dict()
     self.history = { x: [] for x in targets }
 
@@ -60,15 +77,15 @@ class SurveillanceDispatcher:
     return self._node_statistics
 
 
-  def _update_statistic(self, source_id):
+  def _update_statistic(self, source_id, count=1):
     if source_id in self._node_statistics.keys():
-      self._node_statistics[source_id]['Frames processed'] += 1
+      self._node_statistics[source_id]['Frames processed'] += count
     else:
-      self._node_statistics[source_id] = { 'Frames processed': 0 }
+      self._node_statistics[source_id] = { 'Frames processed': count - 1 }
 
 
   def on_process_frame(self, source, timetick, frame_content):
-    match_result = set(frame_content).intersection(set(self._targets))
+    match_result = self._target_set.intersection(frame_content)
 
     if len(match_result) > 0:
       self._logger.info(f"[Node #{source[0]} Domain #{source[1]}] Timetick: {timetick} Match detected:", match_result)
@@ -78,15 +95,67 @@ class SurveillanceDispatcher:
     self._update_statistic(source[0])
 
 
+  def on_process_frames(self, source, timeticks, frame_content):
+    match_result = self._target_set.intersection(frame_content)
+
+    if len(match_result) > 0:
+      self._logger.info(f"[Node #{source[0]} Domain #{source[1]}] Timeticks: {timeticks[0]}..{timeticks[-1]} Match detected:", match_result)
+      for object_id in match_result:
+        self.history[object_id].extend((source[1], timetick) for timetick in timeticks)
+
+    self._update_statistic(source[0], count=len(timeticks))
+
+
+  # Frames of all `sources` (node id, domain id) at every tick of `timeticks`
+  # at once: domains of all targets are looked up in one go and tested
+  # against the observed domains, each hit is a detection. Histories are
+  # appended in the same order as by per node calls.
+  def on_process_all_frames(self, sources, timeticks):
+    if self._occupancy is None:
+      raise SurveillanceError("Batched frame processing requires the domain occupancy")
+
+    if len(sources) == 0 or len(timeticks) == 0:
+      return
+
+    domain_ids = np.asarray([ domain_id for _, domain_id in sources ], dtype=np.int64)
+    target_domains = self._occupancy.domains_of(self._targets)
+    matched = np.flatnonzero(np.isin(target_domains, domain_ids))
+
+    rows_by_domain = dict()
+    if len(matched) > 0:
+      for row, (_, domain_id) in enumerate(sources):
+        rows_by_domain.setdefault(domain_id, []).append(row)
+
+    detections = dict()
+    for column in matched.tolist():
+      for row in rows_by_domain[target_domains[column].item()]:
+        detections.setdefault(row, set()).add(self._targets[column])
+
+    for row in sorted(detections.keys()):
+      match_result = detections[row]
+      node_id, domain_id = sources[row]
+      if len(timeticks) == 1:
+        self._logger.info(f"[Node #{node_id} Domain #{domain_id}] Timetick: {timeticks[0]} Match detected:", match_result)
+      else:
+        self._logger.info(f"[Node #{node_id} Domain #{domain_id}] Timeticks: {timeticks[0]}..{timeticks[-1]} Match detected:", match_result)
+
+    for row in sorted(detections.keys()):
+      for object_id in detections[row]:
+        self.history[object_id].extend((sources[row][1], timetick) for timetick in timeticks)
+
+    for node_id, _ in sources:
+      self._update_statistic(node_id, count=len(timeticks))
+
+
 
 
 class BaseSurveillanceSystem:
-  def __init__(self, domain_graph, supervised_object_ids=[], alpha=1, logger=None):
+  def __init__(self, domain_graph, occupancy, supervised_object_ids=[], alpha=1, logger=None):
     self._logger = Logger("Simple Surveillance System") if logger is None else logger
 
-    self._dispatcher = SurveillanceDispatcher(supervised_object_ids)
+    self._dispatcher = SurveillanceDispatcher(supervised_object_ids, occupancy=occupancy)
 
-    self._surveillance_nodes = self.__get_surveillance_nodes(domain_graph, self._dispatcher, alpha)
+    self._surveillance_nodes = self.__get_surveillance_nodes(domain_graph, self._dispatcher, alpha, occupancy)
     self._targets = supervised_object_ids
     
     self._logger.info("System initialized")
@@ -105,7 +174,7 @@ class BaseSurveillanceSystem:
     return self._dispatcher.node_statistics
 
 
-  def __get_surveillance_nodes(self, domain_graph, dispatcher, alpha):
+  def __get_surveillance_nodes(self, domain_graph, dispatcher, alpha, occupancy):
     if alpha <= 0 or alpha > 1:
       raise SurveillanceError("alpha should be between 0 and 1")
 
@@ -118,12 +187,28 @@ class BaseSurveillanceSystem:
     surveillance_nodes = [ SimpleSurveillanceNode(idx, dispatcher) for idx in range(0, surveillance_size) ]
     for idx in range(len(surveillance_nodes)):
       node = surveillance_nodes[idx]
-      node.set_observed_domain(supervised_domain_nodes[idx])
+      node.set_observed_domain(supervised_domain_nodes[idx], occupancy)
 
     return surveillance_nodes      
 
 
   def on_timetick(self, timetick):
-    for surveillance_node in self._surveillance_nodes:
-      surveillance_node.on_timetick(timetick)
+    self.__process_frames([ timetick ])
+
+  # Nodes have no timers of their own, only object movements change frames
+  def next_event_timetick(self, timetick):
+    return math.inf
+
+  def skip_timeticks(self, timeticks):
+    self.__process_frames(timeticks)
+
+  def __process_frames(self, timeticks):
+    if len(timeticks) == 0:
+      return
+
+    active_nodes = [ node for node in self._surveillance_nodes if node.active ]
+    for node in active_nodes:
+      node.count_frames(len(timeticks))
+
+    self._dispatcher.on_process_all_frames([ (node.id, node.observed_domain.id) for node in active_nodes ], timeticks)
     
@@ -7,7 +7,7 @@ from enum import Enum
 from .utils import Logger
 from .surveillance import SurveillanceError, SimpleSurveillanceNode, SurveillanceDispatcher
 from primitives.graph import Graph, GraphNode
-from primitives.metrics.paths import find_paths, get_shortest_of_paths
+from primitives.metrics.paths import get_direct_route_distances
 from .networking import Network, Sender, Receiver
 from .tasking import TaskStack
 
@@ -39,24 +39,29 @@ class SpatioTemporalSurveillanceGraph(Graph):
   def __init__(self, size, dispatcher, supervised_object_ids):
     self._nodes = { x: SmartSurveillanceNode(x, dispatcher, target_objects=supervised_object_ids) for x in range(0, size) }
     self._adjacency = { x: set() for x in range(0, size) }
+    self._version = 0
+    self._node_set = None
 
   @staticmethod
-  def from_domain_graph(domain_graph, dispatcher, supervised_object_ids):
+  def from_domain_graph(domain_graph, dispatcher, supervised_object_ids, occupancy):
     target_size = domain_graph.size
     domain_graph_nodes = list(domain_graph.nodes)
 
     result_graph = SpatioTemporalSurveillanceGraph(target_size, dispatcher, supervised_object_ids)
     
+    surveillance_node_ids = dict()
     for idx in range(0, target_size):
       surveillance_node = result_graph.get_node(idx)
-      surveillance_node.set_observed_domain(domain_graph_nodes[idx])
+      surveillance_node.set_observed_domain(domain_graph_nodes[idx], occupancy)
+      surveillance_node_ids[domain_graph_nodes[idx].id] = idx
 
     for x in range(0, result_graph.size):
-      for y in range(x + 1, result_graph.size):
-        node_a = result_graph.get_node(x).observed_domain
-        node_b = result_graph.get_node(y).observed_domain
+      node_a = result_graph.get_node(x).observed_domain
 
-        if domain_graph.contains_edge(node_a.id, node_b.id):
+      for node_b in domain_graph.adjacent_nodes(node_a.id):
+        y = surveillance_node_ids[node_b.id]
+
+        if x < y:
           w = node_a.get_weight(node_b.id)
           weight_set = EdgeWeightSet(w, 0, 0)
           result_graph.add_edge(x, y, weight=weight_set)
@@ -75,14 +80,41 @@ class SmartSurveillanceNode(SimpleSurveillanceNode, Receiver):
   def __init__(self, id, dispatcher, target_objects=[]):
     super().__init__(id, dispatcher)
     self.__logger = Logger(f"Surveillance_Node_#{id}")
-    self.__prev_frame = []
+    self.__entered = set()
+    self.__left = set()
+    self.__synced = False
     
     self.__targets = target_objects
     self.__awaiting_objects = dict()
 
   def reset(self):
     self.__awaiting_objects = dict()
-    self.__prev_frame = []
+    self.__forget_frame()
+
+
+  def set_observed_domain(self, domain_obj, occupancy):
+    if self.occupancy is not None:
+      self.occupancy.unsubscribe(self.observed_domain.id, self)
+
+    super().set_observed_domain(domain_obj, occupancy)
+    occupancy.subscribe(domain_obj.id, self)
+    self.__forget_frame()
+
+  # Deltas pushed by the domain occupancy, an object that comes back before
+  # the frame is processed cancels out its own leave (and vice versa)
+  def on_guest_enter(self, object_id):
+    if self.__synced:
+      if object_id in self.__left:
+        self.__left.remove(object_id)
+      else:
+        self.__entered.add(object_id)
+
+  def on_guest_leave(self, object_id):
+    if self.__synced:
+      if object_id in self.__entered:
+        self.__entered.remove(object_id)
+      else:
+        self.__left.add(object_id)
 
 
   def connect(self, network):
@@ -132,11 +164,28 @@ class SmartSurveillanceNode(SimpleSurveillanceNode, Receiver):
       
 
 
-  def __on_training_timetick(self, timetick):
-    frame = self.get_frame_content()
+  # Deltas are dropped while the node does not look at its frame, the next
+  # look sees every guest as incoming
+  def __forget_frame(self):
+    self.__entered = set()
+    self.__left = set()
+    self.__synced = False
+
+  # Objects that entered and left the frame since the previous call
+  def __frame_changes(self):
+    if self.__synced:
+      incoming, outcoming = self.__entered, self.__left
+    else:
+      incoming, outcoming = set(self.get_frame_content()), set()
+      self.__synced = True
 
-    incoming = set(frame).difference(self.__prev_frame)
-    outcoming = set(self.__prev_frame).difference(frame)
+    self.__entered = set()
+    self.__left = set()
+    return incoming, outcoming
+
+
+  def __on_training_timetick(self, timetick):
+    incoming, outcoming = self.__frame_changes()
 
     for object_id in outcoming:
       self.__awaiting_objects[object_id] = (self.id, timetick)
@@ -150,8 +199,6 @@ class SmartSurveillanceNode(SimpleSurveillanceNode, Receiver):
 
         self.__update_weight_set(src_domain_id, start_time, timetick)
         self.__sender.send(self.id, src_domain_id, (Signal.OBJECT_ENTERED_DOMAIN, object_id, timetick, True))
-
-    self.__prev_frame = frame
     
 
 
@@ -168,10 +215,7 @@ class SmartSurveillanceNode(SimpleSurveillanceNode, Receiver):
 
 
   def __process_frame(self, timetick):
-    frame = self.get_frame_content()
-
-    incoming_objects = set(frame).difference(self.__prev_frame)
-    outcoming_objects = set(self.__prev_frame).difference(frame)
+    incoming_objects, outcoming_objects = self.__frame_changes()
 
     detected_objects = []
 
@@ -194,7 +238,6 @@ class SmartSurveillanceNode(SimpleSurveillanceNode, Receiver):
           # print('Non-expectable object in frame') 
 
     self._dispatcher.on_process_frame((self.id, self.observed_domain.id), timetick, detected_objects)
-    self.__prev_frame = frame
 
 
   def __relevant_activation_tasks(self, timetick):
@@ -217,13 +260,29 @@ class SmartSurveillanceNode(SimpleSurveillanceNode, Receiver):
     else:
       self.__on_inference_timetick(timetick)
 
+  # Ticks with an unchanged frame only count processed frames
+  def skip_timeticks(self, timeticks, training=True):
+    if not training and self._active and len(timeticks) > 0:
+      self._dispatcher.on_process_frames((self.id, self.observed_domain.id), timeticks, [])
+
+  # Moment an inactive node is woken up by one of the objects it awaits. An
+  # active node with unseen frame changes (e.g. just activated by a message,
+  # its frame not read yet) has to process the very next tick.
+  def next_activation_timetick(self):
+    if self._active:
+      pending = not self.__synced or len(self.__entered) > 0 or len(self.__left) > 0
+      return -math.inf if pending else math.inf
+    if len(self.__awaiting_objects) == 0:
+      return math.inf
+    return min(estimated_activation_time for _, estimated_activation_time in self.__awaiting_objects.values())
+
   
   def update_active_status(self, timetick):
     current_activation_tasks = self.__relevant_activation_tasks(timetick)
     if len(current_activation_tasks) == 0:
       self.__logger.info(f"Deactivating due to the absense of relevant tasks", current_activation_tasks, "timetick:", timetick)
       self._active = False
-      self.__prev_frame = []
+      self.__forget_frame()
     else:
       self.__logger.info(f'Activating [timetick={timetick}]', current_activation_tasks)
       self._active = True
@@ -232,12 +291,12 @@ class SmartSurveillanceNode(SimpleSurveillanceNode, Receiver):
 
 
 class SpatioTemporalSurveillance:
-  def __init__(self, domain_graph, supervised_object_ids=[], alpha=1, logger=None):
+  def __init__(self, domain_graph, occupancy, supervised_object_ids=[], alpha=1, logger=None):
     self._logger = Logger("SpatioTemporal_Surveillance")
 
     self.__training = False
-    self._dispatcher = SurveillanceDispatcher(targets=supervised_object_ids)
-    self._surveillance_graph = self.__build_surveillance_graph_improved(domain_graph, alpha, self._dispatcher, supervised_object_ids)
+    self._dispatcher = SurveillanceDispatcher(targets=supervised_object_ids, occupancy=occupancy)
+    self._surveillance_graph = self.__build_surveillance_graph(domain_graph, alpha, self._dispatcher, supervised_object_ids, occupancy)
 
     network = Network.establish(self._surveillance_graph.nodes)
     for node in self._surveillance_graph.nodes:
@@ -268,6 +327,15 @@ class SpatioTemporalSurveillance:
       for node in self._surveillance_graph.nodes:
         node.update_active_status(timetick)
 
+  def next_event_timetick(self, timetick):
+    if self.__training:
+      return math.inf
+    return max(timetick, min((node.next_activation_timetick() for node in self._surveillance_graph.nodes), default=math.inf))
+
+  def skip_timeticks(self, timeticks):
+    for node in self._surveillance_graph.nodes:
+      node.skip_timeticks(timeticks, training=self.__training)
+
 
   def on_end_of_time(self):
     if self.__training:
@@ -282,7 +350,7 @@ class SpatioTemporalSurveillance:
 
 
 
-  def __build_surveillance_graph_improved(self, domain_graph, alpha, dispatcher, supervised_object_ids):
+  def __build_surveillance_graph_improved(self, domain_graph, alpha, dispatcher, supervised_object_ids, occupancy):
     if alpha <= 0 or alpha > 1:
       raise SurveillanceError("alpha should be between 0 and 1")
 
@@ -296,18 +364,17 @@ class SpatioTemporalSurveillance:
     for node in deleted_nodes:
       editable_graph.deleted_node(node.id)
 
-    surveillance_graph = SpatioTemporalSurveillanceGraph.from_domain_graph(editable_graph, dispatcher, supervised_object_ids)
+    surveillance_graph = SpatioTemporalSurveillanceGraph.from_domain_graph(editable_graph, dispatcher, supervised_object_ids, occupancy)
 
     for idx in range(0, surveillance_size):
       surveillance_node = surveillance_graph.get_node(idx)
       observed_domain_id = surveillance_node.observed_domain.id
-      surveillance_node.set_observed_domain(domain_graph.get_node(observed_domain_id))
+      surveillance_node.set_observed_domain(domain_graph.get_node(observed_domain_id), occupancy)
 
     return surveillance_graph
 
 
-  # too slow...
-  def __build_surveillance_graph(self, domain_graph, alpha, dispatcher, supervised_object_ids):
+  def __build_surveillance_graph(self, domain_graph, alpha, dispatcher, supervised_object_ids, occupancy):
     if alpha <= 0 or alpha > 1:
       raise SurveillanceError("alpha should be between 0 and 1")
     
@@ -320,22 +387,18 @@ class SpatioTemporalSurveillance:
 
     for idx in range(0, surveillance_size):
       surveillance_node = surveillance_graph.get_node(idx)
-      surveillance_node.set_observed_domain(supervised_domain_nodes[idx])
+      surveillance_node.set_observed_domain(supervised_domain_nodes[idx], occupancy)
 
-    supervised_domain_node_ids = [ node.id for node in supervised_domain_nodes ]
+    surveillance_node_ids = { supervised_domain_nodes[idx].id: idx for idx in range(0, surveillance_size) }
+    supervised_domain_node_ids = set(surveillance_node_ids.keys())
 
     for x in range(0, surveillance_size):
-      for y in range(0, x):
-        src = surveillance_graph.get_node(x).observed_domain.id
-        dest = surveillance_graph.get_node(y).observed_domain.id
+      src = surveillance_graph.get_node(x).observed_domain.id
+      direct_distances = get_direct_route_distances(domain_graph, src, supervised_domain_node_ids)
 
-        candidate_paths = find_paths(domain_graph, src, dest)
-
-        filtered_candidate_paths = filter_direct_routes(candidate_paths, src, dest, supervised_domain_node_ids)
-        if len(filtered_candidate_paths) == 0:
-          continue
-        else:
-          shortest_distance = get_shortest_of_paths(domain_graph, filtered_candidate_paths)
+      for dest, shortest_distance in direct_distances.items():
+        y = surveillance_node_ids[dest]
+        if y < x:
           weight_set = EdgeWeightSet(shortest_distance, 0, 0)
           surveillance_graph.add_edge(x, y, weight=weight_set)
 
@@ -2,7 +2,6 @@ from .utils import EvaluationError
 from abc import ABC, abstractmethod
 from enum import Enum
 from .coordinate import Coordinates
-import random
 import numpy as np
 
 class TaskType(Enum):
@@ -11,6 +10,8 @@ class TaskType(Enum):
 
 
 class Task(ABC):
+  __slots__ = ('_start_coordinates', '_start_timetick', '_type')
+
   def __init__(self, coordinates, timetick):
     self._start_coordinates = coordinates
     self._start_timetick = timetick
@@ -26,6 +27,8 @@ class Task(ABC):
 
 
 class WaitTask(Task):
+  __slots__ = ('_timeout', '_completed_timetick')
+
   def __init__(self, coordinates, timetick, timeout):
     super().__init__(coordinates, timetick)
     self._type = TaskType.WAIT
@@ -36,11 +39,17 @@ class WaitTask(Task):
   def timeout(self):
     return self._timeout
 
+  @property
+  def completed_timetick(self):
+    return self._completed_timetick
+
   def completed(self, coordinates, timetick):
     return timetick >= self._completed_timetick
 
 
 class MoveTask(Task):
+  __slots__ = ('_target',)
+
   def __init__(self, coordinates, timetick, destination_coordinates):
     super().__init__(coordinates, timetick)
     self._type = TaskType.MOVE
@@ -58,6 +67,8 @@ class MoveTask(Task):
 
 
 class TaskStack:
+  __slots__ = ('__stack',)
+
   def __init__(self):
     self.__stack = []
 
@@ -83,40 +94,45 @@ class TaskStack:
 
 
 
+# Move/wait decisions, destination points and wait timeouts are drawn in
+# blocks of `pool_size` from one numpy generator, a task consumes one entry
+# of every pool. Without a seed the generator is seeded from the global numpy
+# state, so np.random.seed still makes runs reproducible.
 class TaskGenerator:
-  def __init__(self, graph, transitions, moving_degree=0.5, max_await=10):
+  def __init__(self, graph, transitions, moving_degree=0.5, max_await=10, seed=None, pool_size=4096):
     self.__graph = graph
     self.__transitions = transitions
     
     self.__moving_degree = moving_degree
     self.__max_await_time = max_await
 
+    self.__random = np.random.default_rng(np.random.randint(0, 2**63 - 1, dtype=np.int64) if seed is None else seed)
+    self.__pool_size = pool_size
+    self.__refill()
 
-  def __generate_destination(self, current_domain_id, object_id):
-    transition_matrix = self.__transitions[object_id]
 
-    destinations = transition_matrix.possible_destinations
+  def __refill(self):
+    self.__moves = (self.__random.random(self.__pool_size) < self.__moving_degree).tolist()
+    self.__points = self.__random.random(self.__pool_size).tolist()
+    self.__timeouts = self.__random.integers(1, self.__max_await_time, size=self.__pool_size, endpoint=True).tolist()
+    self.__cursor = 0
 
-    point = random.random()
-    acc = 0
-    idx = 0
-    target_dest_id = None
 
-    while point > acc:
-      target_dest_id = destinations[idx]
-      acc += transition_matrix.get_transition_probabilty(current_domain_id, target_dest_id)
-      idx += 1
-
-    return target_dest_id
+  def __generate_destination(self, current_domain_id, object_id, point):
+    return self.__transitions[object_id].sample_destination(current_domain_id, point)
 
 
   def create_task(self, object_snapshot, timetick):
-    next_task_type = np.random.binomial(1, self.__moving_degree, 1)[0]
+    if self.__cursor == self.__pool_size:
+      self.__refill()
+
+    cursor = self.__cursor
+    self.__cursor += 1
 
-    if next_task_type == TaskType.MOVE.value:
-      target_dest_id = self.__generate_destination(object_snapshot.coordinates.domain, object_snapshot.id)
+    if self.__moves[cursor]:
+      target_dest_id = self.__generate_destination(object_snapshot.coordinates.domain, object_snapshot.id, self.__points[cursor])
       dest_coord = Coordinates(target_dest_id)
-      return MoveTask(object_snapshot.coordinates, timetick, dest_coord)
+      return MoveTask(object_snapshot.coordinates.copy(), timetick, dest_coord)
 
 
-    return WaitTask(object_snapshot.coordinates, timetick, random.randint(1, self.__max_await_time))
\ No newline at end of file
+    return WaitTask(object_snapshot.coordinates.copy(), timetick, self.__timeouts[cursor])
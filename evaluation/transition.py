@@ -1,6 +1,7 @@
 import random as rnd
 import numpy as np
 import math
+import hashlib
 from enum import Enum
 from abc import ABC, abstractmethod
 
@@ -69,44 +70,256 @@ class TransitionError(Exception):
     self.message = message
 
 
+# Walker alias table of one probability row (Vose's construction): column i
+# is kept with probability threshold[i], otherwise replaced by alias[i].
+def _alias_table(probabilities):
+  size = len(probabilities)
+  total = sum(probabilities)
+  if size == 0 or total <= 0:
+    raise TransitionError("Transition row has no positive probabilities")
+
+  scaled = [ p * size / total for p in probabilities ]
+  threshold = [ 1.0 ] * size
+  alias = list(range(size))
+  small = [ i for i in range(size) if scaled[i] < 1 ]
+  large = [ i for i in range(size) if scaled[i] >= 1 ]
+
+  while len(small) > 0 and len(large) > 0:
+    less = small.pop()
+    more = large.pop()
+    threshold[less] = scaled[less]
+    alias[less] = more
+    scaled[more] = scaled[more] + scaled[less] - 1
+    if scaled[more] < 1:
+      small.append(more)
+    else:
+      large.append(more)
+
+  return threshold, alias
+
+
+# Dense row-stochastic matrix over a group of domains. Rows and columns are
+# indexed by the position of a domain in `keys`.
 class TransitionMatrix:
   def __init__(self, keys):
-    self.__data = { src: { dest: 0 for dest in keys } for src in keys }
+    self.__keys = list(keys)
+    self.__index = { key: idx for idx, key in enumerate(self.__keys) }
+    self.__matrix = np.zeros((len(self.__keys), len(self.__keys)), dtype=np.float64)
+    self.__alias = None
+    self.__alias_arrays = None
+
+    if len(self.__index) != len(self.__keys):
+      raise TransitionError("Transition matrix keys should be unique")
+
+  @staticmethod
+  def from_array(keys, matrix):
+    transition_matrix = TransitionMatrix(keys)
+    matrix = np.asarray(matrix, dtype=np.float64)
+    if matrix.size == 0:
+      matrix = matrix.reshape(transition_matrix.__matrix.shape)
+    if matrix.shape != transition_matrix.__matrix.shape:
+      raise TransitionError(f"Matrix of shape {matrix.shape} does not match {len(transition_matrix.__keys)} keys")
+
+    transition_matrix.__matrix[:] = matrix
+    return transition_matrix
+
+  @property
+  def keys(self):
+    return self.__keys
+
+  @property
+  def size(self):
+    return len(self.__keys)
+
+  @property
+  def matrix(self):
+    view = self.__matrix.view()
+    view.flags.writeable = False
+    return view
 
   def __check_keys(self, src, dest):
-    if src not in self.__data.keys():
+    if src not in self.__index:
       raise TransitionError(f"src={src} is not in transition matrix")
 
-    if dest not in self.__data[src].keys():
+    if dest not in self.__index:
       raise TransitionError(f"dest={dest} is not in transition matrix")
 
     return True
 
 
   def set_transition_probability(self, src, dest, value):
+    if not self.__matrix.flags.writeable:
+      raise TransitionError("Transition matrix is frozen")
+
     if self.__check_keys(src, dest):
-      self.__data[src][dest] = value
+      self.__matrix[self.__index[src], self.__index[dest]] = value
+      self.__alias = None
 
     return self
 
+
+  # Shared matrices are frozen, probabilities cannot be changed afterwards
+  def freeze(self):
+    self.validate()
+    self.__matrix.flags.writeable = False
+    return self
+
+  @property
+  def frozen(self):
+    return not self.__matrix.flags.writeable
+
+  # Identifies the content regardless of the order of keys: the same mapping
+  # src -> dest -> probability gives the same key.
+  def content_key(self):
+    order = sorted(range(self.size), key=lambda idx: self.__keys[idx])
+    digest = hashlib.blake2b(self.__matrix[np.ix_(order, order)].tobytes(), digest_size=16).digest()
+    return (tuple(self.__keys[idx] for idx in order), digest)
+
+  # An empty matrix (the group of an object may be empty) has no rows to check
+  def validate(self, tolerance=1e-9):
+    if (self.__matrix < 0).any():
+      raise TransitionError("Transition probabilities should not be negative")
+
+    sums = self.__matrix.sum(axis=1)
+    invalid = np.nonzero(np.abs(sums - 1) > tolerance)[0]
+    if len(invalid) > 0:
+      raise TransitionError(f"Rows {[ self.__keys[idx] for idx in invalid.tolist() ]} do not sum up to 1")
+
+    return self
+
+
+  # Checks the rows and builds the alias tables, one row per source plus a
+  # last row for sources outside of the matrix: the mean row, i.e. a
+  # destination of a uniformly chosen row. The generator only freezes its
+  # matrices, tables are built lazily on the first sample.
+  def finalize(self):
+    self.validate()
+    rows = np.vstack((self.__matrix, self.__matrix.mean(axis=0)))
+
+    tables = [ _alias_table(row) for row in rows.tolist() ]
+    self.__alias = ([ threshold for threshold, _ in tables ], [ alias for _, alias in tables ])
+    self.__alias_arrays = None
+    return self
+
+
+  def __alias_tables(self):
+    if self.__alias is None:
+      self.finalize()
+    return self.__alias
+
+
+  # `point` is a uniform sample from [0, 1), the destination is found in O(1).
+  # An empty matrix has no destinations, objects stay at `src`.
+  def sample_destination(self, src, point):
+    if self.size == 0:
+      return src
+
+    thresholds, aliases = self.__alias_tables()
+    keys = self.__keys
+    row = self.__index.get(src, len(keys))
+
+    scaled = point * len(keys)
+    column = min(int(scaled), len(keys) - 1)
+    return keys[column] if scaled - column < thresholds[row][column] else keys[aliases[row][column]]
+
+
+  # Vectorized sample_destination for many sources at once
+  def sample_destinations(self, srcs, points):
+    if self.size == 0:
+      return np.asarray(srcs)
+
+    thresholds, aliases = self.__alias_tables()
+    if self.__alias_arrays is None:
+      self.__alias_arrays = (np.asarray(self.__keys), np.asarray(thresholds), np.asarray(aliases))
+    key_array, threshold_array, alias_array = self.__alias_arrays
+
+    size = len(self.__keys)
+    row = np.fromiter((self.__index.get(src, size) for src in srcs), dtype=np.int64, count=len(srcs))
+    scaled = np.asarray(points, dtype=np.float64) * size
+    column = np.minimum(scaled.astype(np.int64), size - 1)
+    keep = scaled - column < threshold_array[row, column]
+    return key_array[np.where(keep, column, alias_array[row, column])]
+
+
+  # Next destinations of many objects with uniform points from `generator`
+  def sample(self, srcs, generator=None):
+    generator = np.random.default_rng() if generator is None else generator
+    return self.sample_destinations(srcs, generator.random(len(srcs)))
+
+
+  # Solution of pi P = pi, sum(pi) = 1 in the least squares sense; for a
+  # reducible chain it is one of the stationary distributions.
+  def stationary_distribution(self):
+    self.validate()
+    if self.size == 0:
+      raise TransitionError("Transition matrix is empty")
+
+    size = self.size
+    system = np.vstack((self.__matrix.T - np.eye(size), np.ones((1, size))))
+    target = np.zeros(size + 1)
+    target[-1] = 1
+
+    distribution, _, _, _ = np.linalg.lstsq(system, target, rcond=None)
+    distribution = np.clip(distribution, 0, None)
+    return dict(zip(self.__keys, (distribution / distribution.sum()).tolist()))
+
+
+  # Expected number of transitions to reach any of `targets` from every
+  # domain, inf where they cannot be reached.
+  def hitting_times(self, targets):
+    self.validate()
+    targets = [ targets ] if not isinstance(targets, (list, tuple, set, frozenset)) else list(targets)
+    for target in targets:
+      self.__check_keys(target, target)
+
+    size = self.size
+    reaching = np.zeros(size, dtype=bool)
+    reaching[[ self.__index[target] for target in targets ]] = True
+    while True:
+      extended = reaching | (self.__matrix[:, reaching] > 0).any(axis=1)
+      if (extended == reaching).all():
+        break
+      reaching = extended
+
+    times = np.full(size, math.inf)
+    times[[ self.__index[target] for target in targets ]] = 0
+
+    # states that may leave the reaching set never hit the targets surely
+    transient = reaching.copy()
+    transient[[ self.__index[target] for target in targets ]] = False
+    while True:
+      leaking = transient & (self.__matrix[:, ~reaching] > 0).any(axis=1)
+      if not leaking.any():
+        break
+      reaching &= ~leaking
+      transient &= ~leaking
+
+    states = np.nonzero(transient)[0]
+    if len(states) > 0:
+      system = np.eye(len(states)) - self.__matrix[np.ix_(states, states)]
+      times[states] = np.linalg.solve(system, np.ones(len(states)))
+
+    return dict(zip(self.__keys, times.tolist()))
+
   
   @property
   def possible_destinations(self):
-    return list(self.__data.keys())
+    return list(self.__keys)
 
   
   def get_transition_probabilty(self, src, dest):
-    if src not in self.__data.keys():
-      _, value = rnd.choice(list(self.__data.items()))
-      return value[dest]
+    if src not in self.__index:
+      if dest not in self.__index:
+        raise TransitionError(f"dest={dest} is not in transition matrix")
+      return self.__matrix[rnd.randrange(self.size), self.__index[dest]].item()
 
     if self.__check_keys(src, dest):
-      return self.__data[src][dest]
+      return self.__matrix[self.__index[src], self.__index[dest]].item()
     else:
       return 0
 
   def __str__(self):
-    body = "\n".join([ f"{src}: {[ f'{str(dest)}: {str(self.__data[src][dest])}' for dest in self.__data[src].keys() ]}" for src in self.__data.keys() ])
+    body = "\n".join([ f"{src}: {[ f'{str(dest)}: {str(self.get_transition_probabilty(src, dest))}' for dest in self.__keys ]}" for src in self.__keys ])
     return f"\n{{\n{body}\n}}\n"
 
 
@@ -117,6 +330,28 @@ class TransitionMatrix:
   
 
 
+# Content addressed store of frozen matrices, one canonical instance per
+# distinct matrix.
+class TransitionMatrixPool:
+  def __init__(self):
+    self.__matrices = dict()
+
+  def __len__(self):
+    return len(self.__matrices)
+
+  @property
+  def matrices(self):
+    return list(self.__matrices.values())
+
+  def intern(self, transition_matrix):
+    key = transition_matrix.content_key()
+    canonical = self.__matrices.get(key)
+    if canonical is None:
+      canonical = transition_matrix.freeze()
+      self.__matrices[key] = canonical
+    return canonical
+
+
 class TransitionGenerator:
   def __init__(self, max_group, transition_gen_type=TransitionType.PLAIN, group_gen_type=GroupType.PLAIN, min_group=1, group_p=0.5, transition_q=0.5):
     self.__transition_type = transition_gen_type
@@ -124,6 +359,13 @@ class TransitionGenerator:
     self.__group_generator = self.__init_group_generator(group_gen_type, min_group, max_group, group_p)
     self.__elements = [ i for i in range(max_group) ]
     rnd.shuffle(self.__elements)
+    self.__pool = TransitionMatrixPool()
+    self.__generated = dict()
+
+  # Distinct matrices handed out so far, shared by all objects with equal ones
+  @property
+  def pool(self):
+    return self.__pool
 
 
   def __init_group_generator(self, group_gen_type, min, max, p):
@@ -165,6 +407,28 @@ class TransitionGenerator:
     return []
 
 
+  def __generate_matrix(self, group):
+    rows = []
+
+    row_counter = 0
+    for src in group:
+      probabilities = self.__generate_probability_row(src, destinations=group, shift=-row_counter)
+      row_counter += 1
+      rows.append([ probabilities[dest] for dest in group ])
+
+    return self.__pool.intern(TransitionMatrix.from_array(group, rows))
+
+
+  # The content of a generated matrix only depends on the group order, or on
+  # the group members for plain transitions
+  def __group_key(self, group):
+    if self.__transition_type == TransitionType.PLAIN:
+      return tuple(sorted(group))
+    return tuple(group)
+
+
+  # Matrices are interned: objects with equal matrices get the same frozen
+  # instance, memory grows with the number of distinct matrices only.
   def get_samples(self, count):
     group_sizes = self.__group_generator.get_samples(count)
 
@@ -175,17 +439,12 @@ class TransitionGenerator:
       group = self.__elements[0: group_size]
       rnd.shuffle(group)
 
-      transition_matrix = TransitionMatrix(group)
-
-      row_counter = 0
-      for src in group:
-        probabilities = self.__generate_probability_row(src, destinations=group, shift=-row_counter)
-        row_counter += 1
-        for dest in probabilities.keys():
-          prob = probabilities[dest]
-          transition_matrix.set_transition_probability(src, dest, prob)
+      key = self.__group_key(group)
+      transition_matrix = self.__generated.get(key)
+      if transition_matrix is None:
+        transition_matrix = self.__generate_matrix(group)
+        self.__generated[key] = transition_matrix
 
       matrices.append(transition_matrix)
   
     return matrices
-
@@ -0,0 +1,255 @@
+import numpy as np
+from .graph import Graph, GraphInternalError
+
+
+class CompactGraphNode:
+  __slots__ = ('_graph', '_id', '_attribute')
+
+  def __init__(self, graph, id):
+    self._graph = graph
+    self._id = id
+    self._attribute = None
+
+  @property
+  def attribute(self):
+    if self._attribute is None:
+      self._attribute = dict()
+    return self._attribute
+
+  def get_weight(self, adjacment_node_id):
+    return self._graph.get_weight(self._id, adjacment_node_id)
+
+  @property
+  def id(self):
+    return self._id
+
+  def __hash__(self):
+    return self._id
+
+  def __eq__(self, other):
+    return self.__hash__() == other.__hash__()
+
+  def __repr__(self):
+    return self.__str__()
+
+  def __str__(self):
+    return f"{{ id:{self._id} }}"
+
+
+# Immutable undirected graph in CSR layout: the neighbors of node `i` are
+# neighbors[offsets[i]:offsets[i + 1]] (sorted), with matching weights.
+# Every edge is stored in both directions, loops are stored once.
+class CompactGraph:
+  def __init__(self, offsets, neighbors, weights, node_ids=None):
+    self._offsets = np.asarray(offsets, dtype=np.int64)
+    self._neighbors = np.asarray(neighbors, dtype=np.int64)
+    self._weights = np.asarray(weights)
+    self._node_ids = node_ids
+    self._views = dict()
+    self._node_set = None
+
+    if len(self._offsets) == 0 or len(self._neighbors) != len(self._weights) or self._offsets[-1] != len(self._neighbors):
+      raise GraphInternalError("Compact graph arrays are inconsistent")
+
+  @staticmethod
+  def from_edges(size, sources, destinations, weights=None, node_ids=None):
+    sources = np.asarray(sources, dtype=np.int64)
+    destinations = np.asarray(destinations, dtype=np.int64)
+    weights = np.zeros(len(sources), dtype=np.int64) if weights is None else np.asarray(weights)
+
+    if len(sources) != len(destinations) or len(sources) != len(weights):
+      raise GraphInternalError("Edge arrays should have the same length")
+
+    if len(sources) > 0 and (min(sources.min(), destinations.min()) < 0 or max(sources.max(), destinations.max()) >= size):
+      raise GraphInternalError(f"Edge endpoints do not belong to a graph of size {size}")
+
+    # keep the first occurrence of every undirected edge, as Graph.add_edge does
+    low = np.minimum(sources, destinations)
+    high = np.maximum(sources, destinations)
+    _, first = np.unique(low * size + high, return_index=True)
+    low, high, weights = low[first], high[first], weights[first]
+
+    loops = low == high
+    heads = np.concatenate((low, high[~loops]))
+    tails = np.concatenate((high, low[~loops]))
+    weights = np.concatenate((weights, weights[~loops]))
+
+    return CompactGraph._from_arcs(size, heads, tails, weights, node_ids)
+
+  @staticmethod
+  def from_graph(graph):
+    node_ids = sorted(node.id for node in graph)
+    dense = node_ids == list(range(len(node_ids)))
+    index = None if dense else { node_id: idx for idx, node_id in enumerate(node_ids) }
+
+    heads, tails, weights = [], [], []
+    for node in graph:
+      head = node.id if dense else index[node.id]
+      for adjacent_node in graph.adjacent_nodes(node.id):
+        heads.append(head)
+        tails.append(adjacent_node.id if dense else index[adjacent_node.id])
+        weights.append(node.get_weight(adjacent_node.id))
+
+    return CompactGraph._from_arcs(
+      len(node_ids),
+      np.asarray(heads, dtype=np.int64),
+      np.asarray(tails, dtype=np.int64),
+      np.asarray(weights) if len(weights) > 0 else np.zeros(0, dtype=np.int64),
+      None if dense else np.asarray(node_ids, dtype=np.int64))
+
+  @staticmethod
+  def _from_arcs(size, heads, tails, weights, node_ids=None):
+    order = np.lexsort((tails, heads))
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(heads, minlength=size), out=offsets[1:])
+    return CompactGraph(offsets, tails[order], weights[order], node_ids)
+
+  def to_graph(self):
+    heads = np.repeat(np.arange(self.size, dtype=np.int64), np.diff(self._offsets))
+    forward = heads <= self._neighbors
+    heads, tails = heads[forward], self._neighbors[forward]
+
+    if self._node_ids is None:
+      return Graph.from_edges(self.size, heads.tolist(), tails.tolist(), self._weights[forward].tolist())
+
+    node_ids = np.asarray(self._node_ids)
+    return Graph.from_edges(self.size, node_ids[heads].tolist(), node_ids[tails].tolist(), self._weights[forward].tolist(), node_ids=node_ids.tolist())
+
+  def save_to_file(self, filename="graph.bin"):
+    from .storage import write_graph
+    write_graph(self, filename)
+
+  @staticmethod
+  def load(filename, mmap=True):
+    from .storage import read_graph
+    return read_graph(filename, mmap=mmap)
+
+  @property
+  def offsets(self):
+    return self._offsets
+
+  @property
+  def neighbors(self):
+    return self._neighbors
+
+  @property
+  def weights(self):
+    return self._weights
+
+  @property
+  def node_ids(self):
+    if self._node_ids is None:
+      return np.arange(self.size, dtype=np.int64)
+    return self._node_ids
+
+  # The arrays are never modified, see Graph.version
+  @property
+  def version(self):
+    return 0
+
+  @property
+  def nbytes(self):
+    return self._offsets.nbytes + self._neighbors.nbytes + self._weights.nbytes
+
+  @property
+  def size(self):
+    return len(self._offsets) - 1
+
+  @property
+  def degrees(self):
+    return np.diff(self._offsets)
+
+  @property
+  def edges(self):
+    edges = set()
+    for node_id in range(self.size):
+      for adjacent_id in self.adjacent_ids(node_id).tolist():
+        if node_id <= adjacent_id:
+          edges.add((self.get_node(node_id), self.get_node(adjacent_id)))
+    return edges
+
+  @property
+  def nodes(self):
+    if self._node_set is None:
+      self._node_set = frozenset(self)
+    return self._node_set
+
+  def __iter__(self):
+    return (self.get_node(node_id) for node_id in range(self.size))
+
+  def __contains__(self, node_id):
+    return isinstance(node_id, (int, np.integer)) and 0 <= node_id < self.size
+
+  def contains_node(self, node):
+    return self.__contains__(node.id)
+
+  def get_node(self, id):
+    if id not in self:
+      return None
+
+    view = self._views.get(id)
+    if view is None:
+      view = CompactGraphNode(self, int(id))
+      self._views[id] = view
+    return view
+
+  def node(self, id):
+    return self.get_node(id)
+
+  def adjacent_ids(self, node_id):
+    return self._neighbors[self._offsets[node_id]:self._offsets[node_id + 1]]
+
+  def adjacent_weights(self, node_id):
+    return self._weights[self._offsets[node_id]:self._offsets[node_id + 1]]
+
+  # All (node, neighbor) arcs leaving the given nodes, in CSR order
+  def expand(self, node_ids):
+    node_ids = np.asarray(node_ids, dtype=np.int64)
+    starts = self._offsets[node_ids]
+    counts = self._offsets[node_ids + 1] - starts
+    shift = np.repeat(np.cumsum(counts) - counts - starts, counts)
+    positions = np.arange(counts.sum(), dtype=np.int64) - shift
+    return np.repeat(node_ids, counts), self._neighbors[positions]
+
+  def weighted_adjacency(self, node_id):
+    start = self._offsets[node_id]
+    end = self._offsets[node_id + 1]
+    return zip(self._neighbors[start:end].tolist(), self._weights[start:end].tolist())
+
+  def adjacent_nodes(self, node_id):
+    if node_id in self:
+      return [ self.get_node(adjacent_id) for adjacent_id in self.adjacent_ids(node_id).tolist() ]
+    else:
+      return []
+
+  def arc_index(self, node_a, node_b):
+    if node_a not in self or node_b not in self:
+      return None
+
+    start = self._offsets[node_a]
+    end = self._offsets[node_a + 1]
+    position = start + np.searchsorted(self._neighbors[start:end], node_b)
+    if position < end and self._neighbors[position] == node_b:
+      return position
+    return None
+
+  def contains_edge(self, node_a, node_b):
+    return self.arc_index(node_a, node_b) is not None
+
+  def get_weight(self, node_a, node_b):
+    position = self.arc_index(node_a, node_b)
+    if position is None:
+      raise GraphInternalError(f'Get weight: node {node_b} is not adjacment to {node_a}')
+    return self._weights[position].item()
+
+  def print(self):
+    print(self.__str__())
+
+  def __str__(self):
+    acc = "\n"
+    for node_id in range(self.size):
+      acc += f"Node #{node_id}: {list(zip(self.adjacent_ids(node_id).tolist(), self.adjacent_weights(node_id).tolist()))}\n"
+    return acc
+
+  def __repr__(self):
+    return self.__str__()
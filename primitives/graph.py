@@ -1,13 +1,20 @@
 import random
 import pickle
-from enum import IntFlag
+from enum import Enum, IntFlag
 import itertools
+import math
+import numpy as np
 
+# Nodes owned by a Graph keep a reference to it, weight changes made
+# through a node bump Graph.version like the graph's own edits do
 class GraphNode:
-  def __init__(self, id):
+  __slots__ = ('_id', 'attribute', '_adjacency_edge_weights', '_graph')
+
+  def __init__(self, id, graph=None):
     self._id = id
     self.attribute = dict()
     self._adjacency_edge_weights = dict()
+    self._graph = graph
 
   def get_weight(self, adjacment_node_id):
     if adjacment_node_id in self._adjacency_edge_weights.keys():
@@ -17,10 +24,16 @@ class GraphNode:
 
   def set_weight(self, weight, adjacment_node_id):
     self._adjacency_edge_weights[adjacment_node_id] = weight
+    self.__touch()
 
   def del_weight(self, adjacment_node_id):
     if adjacment_node_id in self._adjacency_edge_weights.keys():
       del self._adjacency_edge_weights[adjacment_node_id]
+      self.__touch()
+
+  def __touch(self):
+    if self._graph is not None:
+      self._graph._version += 1
 
   @property
   def id(self):
@@ -38,6 +51,15 @@ class GraphNode:
   def __str__(self):
     return f"{{ id:{self._id} }}"
 
+  # Nodes pickled before __slots__ carry their attributes as a plain dict,
+  # subclasses with a __dict__ pickle as (dict, slots)
+  def __setstate__(self, state):
+    if isinstance(state, tuple):
+      state = { **(state[0] or {}), **(state[1] or {}) }
+    self._graph = None
+    for name, value in state.items():
+      setattr(self, name, value)
+
 
 class GraphInternalError(Exception):
   def __init__(self, message):
@@ -46,8 +68,19 @@ class GraphInternalError(Exception):
 
 class Graph:
   def __init__(self, size):
-    self._nodes = { x: GraphNode(x) for x in range(0, size) }
+    self._nodes = { x: GraphNode(x, self) for x in range(0, size) }
     self._adjacency = { x: set() for x in range(0, size) }
+    self._version = 0
+    self._node_set = None
+
+  # Graphs pickled before versioning have neither the version nor the cache,
+  # nor do their nodes refer back to them
+  def __setstate__(self, state):
+    self.__dict__.update(state)
+    self.__dict__.setdefault('_version', 0)
+    self.__dict__.setdefault('_node_set', None)
+    for node in self._nodes.values():
+      node._graph = self
 
   @property
   def size(self):
@@ -67,9 +100,17 @@ class Graph:
 
     return edges
 
+  # Shared between calls and rebuilt after add_node / delete_node only
   @property
   def nodes(self):
-    return set(self._nodes.values())
+    if self._node_set is None:
+      self._node_set = frozenset(self._nodes.values())
+    return self._node_set
+
+  # Bumped on every structural change, caches built over the graph compare it
+  @property
+  def version(self):
+    return self._version
 
   def __iter__(self):
     self.__iter = iter(self._nodes.values())
@@ -85,8 +126,10 @@ class Graph:
     return self.__contains__(node.id)
 
   def add_node(self):
-    self._nodes[self.size] = GraphNode(self.size)
+    self._nodes[self.size] = GraphNode(self.size, self)
     self._adjacency[self.size] = set()
+    self._version += 1
+    self._node_set = None
     return self
 
   def delete_node(self, node_id):
@@ -98,7 +141,7 @@ class Graph:
         for y in range(x + 1, len(adjacent_nodes)):
           node_a = adjacent_nodes[x]
           node_b = adjacent_nodes[y]
-          candidate_weight = target_node.get_weight(node_a) + target_node.get_weight(node_b)
+          candidate_weight = target_node.get_weight(node_a.id) + target_node.get_weight(node_b.id)
 
           if self.contains_edge(node_a.id, node_b.id):
             orig_weight = node_a.get_weight(node_b.id)
@@ -106,13 +149,16 @@ class Graph:
               node_a.set_weight(candidate_weight, node_b.id)
               node_b.set_weight(candidate_weight, node_a.id)
           else:
-            self.add_edge(node_a, node_b, weight=candidate_weight)
+            self.add_edge(node_a.id, node_b.id, weight=candidate_weight)
 
     for adjacent_node in adjacent_nodes:
       adjacent_node.del_weight(node_id)
       self._adjacency[adjacent_node.id].remove(target_node)
     del self._adjacency[node_id]
     del self._nodes[node_id]
+    target_node._graph = None
+    self._version += 1
+    self._node_set = None
 
 
 
@@ -128,6 +174,9 @@ class Graph:
     else:
       return []
 
+  def weighted_adjacency(self, node_id):
+    return self._nodes[node_id]._adjacency_edge_weights.items()
+
   def contains_edge(self, node_a, node_b):
     res = node_a in self and node_b in self and self._nodes[node_b] in self.adjacent_nodes(node_a) and self._nodes[node_a] in self.adjacent_nodes(node_b)
     return res
@@ -143,18 +192,62 @@ class Graph:
 
         self._adjacency[node_a].add(adjacent_node_b)
         self._adjacency[node_b].add(adjacent_node_a)
+        self._version += 1
         return True
       else:
         return False
     else:
       raise GraphInternalError(f"Nodes {node_a} or {node_b} do not belong to the graph")
 
-  def save_to_file(self, filename="graph.pkl"):
+  @staticmethod
+  def from_edges(size, sources, destinations, weights=None, node_ids=None):
+    graph = Graph(size if node_ids is None else 0)
+    nodes = graph._nodes
+    adjacency = graph._adjacency
+
+    if node_ids is not None:
+      for node_id in node_ids:
+        nodes[node_id] = GraphNode(node_id, graph)
+        adjacency[node_id] = set()
+
+    if weights is None:
+      weights = [ 0 ] * len(sources)
+
+    for src, dest, weight in zip(sources, destinations, weights):
+      if src not in nodes or dest not in nodes:
+        raise GraphInternalError(f"Nodes {src} or {dest} do not belong to the graph")
+
+      node_a = nodes[src]
+      if dest in node_a._adjacency_edge_weights:
+        continue
+
+      node_b = nodes[dest]
+      node_a.set_weight(weight, dest)
+      node_b.set_weight(weight, src)
+      adjacency[src].add(node_b)
+      adjacency[dest].add(node_a)
+
+    return graph
+
+  # Pickled by default, `binary` writes the graph file format of storage,
+  # which holds numeric weights only
+  def save_to_file(self, filename="graph.pkl", binary=False):
+    if binary:
+      from .storage import write_graph
+      write_graph(self, filename)
+      return
+
     with open(filename, 'wb') as output:
       pickle.dump(self, output, pickle.HIGHEST_PROTOCOL)
 
+  # Binary graph files are converted back to a Graph, use CompactGraph.load
+  # to query them in place through a memory map.
   @staticmethod
   def load(filename):
+    from .storage import is_graph_file, read_graph
+    if is_graph_file(filename):
+      return read_graph(filename, mmap=False).to_graph()
+
     graph = None
     with open(filename, 'rb') as input:
       graph = pickle.load(input)
@@ -180,6 +273,13 @@ class GraphCategory(IntFlag):
   WEIGHTED = 1 << 2
 
 
+class GraphTopology(Enum):
+  RANDOM = 0
+  GRID = 1
+  GEOMETRIC = 2
+  PREFERENTIAL = 3
+
+
 class GraphCategorySet:
   def __init__(self, *flags):
     self._preset = 0
@@ -193,7 +293,10 @@ class GraphCategorySet:
 class GraphGenerator:
   
   @staticmethod
-  def create(size, presets=('weighted', 'connected'), min_weight=1, max_weight=100):
+  def create(size, presets=('weighted', 'connected'), min_weight=1, max_weight=100, average_degree=None, edges_count=None, compact=False):
+    if average_degree is not None or edges_count is not None or compact:
+      return GraphGenerator.create_sparse(size, presets=presets, min_weight=min_weight, max_weight=max_weight, average_degree=average_degree, edges_count=edges_count, compact=compact)
+
     preset = GraphCategorySet(*presets)
 
     MIN_EDGES_LOOPS = size
@@ -262,6 +365,228 @@ class GraphGenerator:
     return graph
 
 
+  # Samples a graph with a given number of non-loop edges (or average degree)
+  # without materialising the set of absent edges: O(E) memory.
+  @staticmethod
+  def create_sparse(size, presets=('weighted', 'connected'), min_weight=1, max_weight=100, average_degree=None, edges_count=None, compact=False):
+    preset = GraphCategorySet(*presets)
+
+    max_edges = size * (size - 1) // 2
+    min_edges = size - 1 if GraphCategory.CONNECTED in preset and size > 0 else 0
+
+    if edges_count is None:
+      edges_count = min(int(round(average_degree * size / 2)), max_edges) if average_degree is not None else min_edges
+    if edges_count > max_edges:
+      raise GraphInternalError(f"Graph of size {size} cannot have {edges_count} edges")
+    edges_count = max(edges_count, min_edges)
+
+    if GraphCategory.CONNECTED in preset:
+      chain = np.arange(0, size - 1, dtype=np.int64)
+      sources, destinations = chain, chain + 1
+    else:
+      sources = destinations = np.zeros(0, dtype=np.int64)
+
+    extra_sources, extra_destinations = GraphGenerator.__sample_edges(size, edges_count - len(sources), excluded=sources * size + destinations)
+    sources = np.concatenate((sources, extra_sources))
+    destinations = np.concatenate((destinations, extra_destinations))
+    weights = GraphGenerator.__sample_weights(len(sources), preset, min_weight, max_weight)
+
+    return GraphGenerator._build(size, sources, destinations, weights, preset, compact)
+
+
+  # Square-ish lattice: node i sits at (i // columns, i % columns) and is linked
+  # to its right and lower neighbours (and the diagonal ones on request).
+  @staticmethod
+  def create_grid(size, columns=None, presets=('weighted',), min_weight=1, max_weight=100, diagonals=False, compact=False):
+    preset = GraphCategorySet(*presets)
+    columns = columns if columns is not None else max(1, math.ceil(math.sqrt(size)))
+
+    nodes = np.arange(0, size, dtype=np.int64)
+    column = nodes % columns
+
+    shifts = [ (1, column < columns - 1), (columns, np.ones(size, dtype=bool)) ]
+    if diagonals:
+      shifts += [ (columns + 1, column < columns - 1), (columns - 1, column > 0) ]
+
+    sources, destinations = [], []
+    for shift, allowed in shifts:
+      mask = allowed & (nodes + shift < size)
+      sources.append(nodes[mask])
+      destinations.append(nodes[mask] + shift)
+
+    sources = np.concatenate(sources)
+    destinations = np.concatenate(destinations)
+    weights = GraphGenerator.__sample_weights(len(sources), preset, min_weight, max_weight)
+
+    return GraphGenerator._build(size, sources, destinations, weights, preset, compact)
+
+
+  # Random geometric graph in the unit square: nodes closer than `radius` are
+  # linked and weighted by their distance mapped onto [min_weight, max_weight].
+  @staticmethod
+  def create_geometric(size, radius=None, average_degree=6, presets=('weighted', 'connected'), min_weight=1, max_weight=100, compact=False):
+    preset = GraphCategorySet(*presets)
+    radius = radius if radius is not None else math.sqrt(average_degree / (math.pi * max(size, 1)))
+
+    points = np.random.random_sample((size, 2))
+    sources, destinations = GraphGenerator.__close_pairs(points, radius)
+
+    if GraphCategory.CONNECTED in preset:
+      bridge_sources, bridge_destinations = GraphGenerator.__bridge_components(points, sources, destinations)
+      sources = np.concatenate((sources, bridge_sources))
+      destinations = np.concatenate((destinations, bridge_destinations))
+
+    if GraphCategory.WEIGHTED in preset:
+      distances = np.linalg.norm(points[sources] - points[destinations], axis=1)
+      weights = np.rint(min_weight + (max_weight - min_weight) * np.minimum(distances / radius, 1)).astype(np.int64)
+    else:
+      weights = np.zeros(len(sources), dtype=np.int64)
+
+    return GraphGenerator._build(size, sources, destinations, weights, preset, compact)
+
+
+  # Barabasi-Albert style growth (Batagelj-Brandes edge list): every new node
+  # links `m` times to endpoints of already drawn edges, i.e. proportionally
+  # to degree. Repeated picks and self links are dropped, so the graph is a
+  # connected tree plus up to (m - 1) extra edges per node.
+  @staticmethod
+  def create_preferential(size, m=2, presets=('weighted',), min_weight=1, max_weight=100, compact=False):
+    preset = GraphCategorySet(*presets)
+
+    if size < 2:
+      empty = np.zeros(0, dtype=np.int64)
+      return GraphGenerator._build(size, empty, empty, empty, preset, compact)
+
+    # slot k >= 1 holds the pair (endpoints[2k], endpoints[2k + 1]); slot 0 is a seed loop on node 0
+    slots = (size - 1) * m + 1
+    k = np.arange(1, slots, dtype=np.int64)
+
+    endpoints = np.zeros(2 * slots, dtype=np.int64)
+    endpoints[2 * k] = 1 + (k - 1) // m
+
+    references = np.arange(2 * slots, dtype=np.int64)
+    references[2 * k + 1] = (np.random.random_sample(len(k)) * 2 * k).astype(np.int64)
+
+    targets = references[2 * k + 1]
+    unresolved = (targets % 2 == 1) & (targets > 1)
+    while unresolved.any():
+      targets[unresolved] = references[targets[unresolved]]
+      unresolved = (targets % 2 == 1) & (targets > 1)
+
+    sources = endpoints[2 * k]
+    destinations = endpoints[targets]
+    linked = sources != destinations
+    sources, destinations = sources[linked], destinations[linked]
+    weights = GraphGenerator.__sample_weights(len(sources), preset, min_weight, max_weight)
+
+    return GraphGenerator._build(size, sources, destinations, weights, preset, compact)
+
+
+  @staticmethod
+  def __close_pairs(points, radius):
+    size = len(points)
+    cells_per_side = max(1, int(1 / radius)) if radius > 0 else 1
+    cells = np.minimum((points * cells_per_side).astype(np.int64), cells_per_side - 1)
+    cell_ids = cells[:, 0] * cells_per_side + cells[:, 1]
+
+    order = np.argsort(cell_ids, kind='stable')
+    cell_starts = np.searchsorted(cell_ids[order], np.arange(cells_per_side * cells_per_side + 1))
+
+    sources, destinations = [], []
+    for dx, dy in [ (0, 0), (0, 1), (1, -1), (1, 0), (1, 1) ]:
+      x = cells[:, 0] + dx
+      y = cells[:, 1] + dy
+      inside = (x < cells_per_side) & (y >= 0) & (y < cells_per_side)
+      nodes = np.nonzero(inside)[0]
+      neighbor_cells = x[inside] * cells_per_side + y[inside]
+
+      starts = cell_starts[neighbor_cells]
+      counts = cell_starts[neighbor_cells + 1] - starts
+      candidates_src = np.repeat(nodes, counts)
+      first = np.repeat(np.cumsum(counts) - counts, counts)
+      candidates_dest = order[np.repeat(starts, counts) + np.arange(counts.sum()) - first]
+
+      mask = np.linalg.norm(points[candidates_src] - points[candidates_dest], axis=1) <= radius
+      if dx == 0 and dy == 0:
+        mask &= candidates_src < candidates_dest
+
+      sources.append(candidates_src[mask])
+      destinations.append(candidates_dest[mask])
+
+    if size == 0:
+      return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(sources), np.concatenate(destinations)
+
+
+  # Links the components in order of their leftmost point
+  @staticmethod
+  def __bridge_components(points, sources, destinations):
+    from .metrics.traversal import component_roots
+    labels = component_roots(len(points), sources, destinations)
+    roots = np.unique(labels)
+    if len(roots) <= 1:
+      return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    leftmost = np.full(len(points), -1, dtype=np.int64)
+    order = np.argsort(points[:, 0])[::-1]
+    leftmost[labels[order]] = order
+    representatives = leftmost[roots]
+    representatives = representatives[np.argsort(points[representatives, 0])]
+    return representatives[:-1], representatives[1:]
+
+
+  @staticmethod
+  def _build(size, sources, destinations, weights, preset, compact=False):
+    if GraphCategory.LOOPS in preset:
+      loops = np.arange(0, size, dtype=np.int64)
+      sources = np.concatenate((loops, sources))
+      destinations = np.concatenate((loops, destinations))
+      weights = np.concatenate((np.zeros(size, dtype=weights.dtype), weights))
+
+    if compact:
+      from .compact import CompactGraph
+      return CompactGraph.from_edges(size, sources, destinations, weights)
+    return Graph.from_edges(size, sources.tolist(), destinations.tolist(), weights.tolist())
+
+
+  @staticmethod
+  def __sample_weights(count, preset, min_weight, max_weight):
+    if GraphCategory.WEIGHTED in preset:
+      return np.random.randint(min_weight, max_weight + 1, size=count, dtype=np.int64)
+    return np.zeros(count, dtype=np.int64)
+
+
+  # Edges are encoded as low * size + high keys
+  @staticmethod
+  def __sample_edges(size, count, excluded):
+    if count <= 0:
+      return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    available = size * (size - 1) // 2 - len(excluded)
+
+    if 2 * count > available:
+      low, high = np.triu_indices(size, k=1)
+      keys = np.setdiff1d(low.astype(np.int64) * size + high, excluded)
+      keys = np.random.choice(keys, size=count, replace=False)
+      return keys // size, keys % size
+
+    keys = np.zeros(0, dtype=np.int64)
+    while len(keys) < count:
+      batch = int((count - len(keys)) * 1.1) + 16
+      a = np.random.randint(0, size, size=batch, dtype=np.int64)
+      b = np.random.randint(0, size, size=batch, dtype=np.int64)
+      candidates = np.minimum(a, b) * size + np.maximum(a, b)
+      candidates = candidates[a != b]
+      candidates = candidates[~np.isin(candidates, excluded)]
+      candidates = candidates[~np.isin(candidates, keys)]
+
+      _, first = np.unique(candidates, return_index=True)
+      keys = np.concatenate((keys, candidates[np.sort(first)]))
+
+    keys = keys[:count]
+    return keys // size, keys % size
+
+
 
 if __name__ == "__main__":
   size = 3
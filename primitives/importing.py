@@ -0,0 +1,236 @@
+import os
+import csv
+import itertools
+import numpy as np
+import xml.etree.ElementTree as ElementTree
+from enum import Enum
+from .graph import Graph
+from .compact import CompactGraph
+
+
+class GraphFormat(Enum):
+  EDGE_LIST = 0
+  CSV = 1
+  GRAPHML = 2
+
+
+class GraphImportError(Exception):
+  def __init__(self, message):
+    self.message = message
+
+
+# Maps arbitrary node labels to dense ids in order of first appearance
+class LabelIndex:
+  def __init__(self):
+    self._ids = dict()
+    self._labels = []
+
+  @property
+  def labels(self):
+    return self._labels
+
+  @property
+  def size(self):
+    return len(self._labels)
+
+  def __len__(self):
+    return len(self._labels)
+
+  def __contains__(self, label):
+    return label in self._ids
+
+  def id(self, label):
+    node_id = self._ids.get(label)
+    if node_id is None:
+      node_id = len(self._labels)
+      self._ids[label] = node_id
+      self._labels.append(label)
+    return node_id
+
+  def ids(self, labels):
+    return np.fromiter((self.id(label) for label in labels), dtype=np.int64, count=len(labels))
+
+
+# Edges are collected chunk by chunk into id / weight arrays, labels are
+# remapped on the fly. The graph is built once at the end, duplicates are
+# dropped in bulk (first occurrence wins, as in Graph.add_edge).
+class _EdgeChunks:
+  def __init__(self, default_weight):
+    self._default_weight = default_weight
+    self._index = LabelIndex()
+    self._sources = []
+    self._destinations = []
+    self._weights = []
+
+  @property
+  def index(self):
+    return self._index
+
+  def append(self, sources, destinations, weights):
+    self._sources.append(self._index.ids(sources))
+    self._destinations.append(self._index.ids(destinations))
+    self._weights.append(np.asarray([ self.__weight(weight) for weight in weights ], dtype=np.float64))
+
+  def __weight(self, value):
+    if value is None or value == '':
+      return self._default_weight
+    try:
+      return float(value)
+    except ValueError:
+      raise GraphImportError(f"Edge weight {value!r} is not a number")
+
+  @staticmethod
+  def __concatenate(chunks, dtype):
+    return np.concatenate(chunks) if len(chunks) > 0 else np.zeros(0, dtype=dtype)
+
+  def build(self, compact):
+    sources = self.__concatenate(self._sources, np.int64)
+    destinations = self.__concatenate(self._destinations, np.int64)
+    weights = self.__concatenate(self._weights, np.float64)
+
+    if len(weights) > 0 and np.all(weights == np.round(weights)):
+      weights = weights.astype(np.int64)
+
+    size = self._index.size
+    if compact:
+      graph = CompactGraph.from_edges(size, sources, destinations, weights)
+    else:
+      graph = Graph.from_edges(size, sources.tolist(), destinations.tolist(), weights.tolist())
+
+    return graph, self._index.labels
+
+
+def _chunks(rows, chunk_size):
+  while True:
+    chunk = list(itertools.islice(rows, chunk_size))
+    if len(chunk) == 0:
+      return
+    yield chunk
+
+
+# One edge per line: "source target [weight]", a single label declares an
+# isolated node. Empty lines and comments are skipped.
+def read_edge_list(filename, delimiter=None, comment='#', default_weight=0, chunk_size=65536, compact=False):
+  edges = _EdgeChunks(default_weight)
+
+  with open(filename, 'r') as input:
+    for chunk in _chunks(input, chunk_size):
+      sources, destinations, weights = [], [], []
+
+      for line in chunk:
+        fields = line.split(comment, 1)[0].split(delimiter)
+        fields = [ field.strip() for field in fields if field.strip() != '' ]
+
+        if len(fields) == 0:
+          continue
+        elif len(fields) == 1:
+          edges.index.id(fields[0])
+        elif len(fields) <= 3:
+          edges.index.id(fields[0])
+          edges.index.id(fields[1])
+          sources.append(fields[0])
+          destinations.append(fields[1])
+          weights.append(fields[2] if len(fields) == 3 else None)
+        else:
+          raise GraphImportError(f"Malformed edge list line: {line.strip()!r}")
+
+      edges.append(sources, destinations, weights)
+
+  return edges.build(compact)
+
+
+# Delimited file with a header row, edge endpoints and the optional weight are
+# taken from the named columns.
+def read_csv(filename, source='source', target='target', weight='weight', delimiter=',', default_weight=0, chunk_size=65536, compact=False):
+  edges = _EdgeChunks(default_weight)
+
+  with open(filename, 'r', newline='') as input:
+    reader = csv.DictReader(input, delimiter=delimiter)
+    columns = reader.fieldnames or []
+    if source not in columns or target not in columns:
+      raise GraphImportError(f"Columns {source!r} and {target!r} are required, found {columns}")
+
+    for chunk in _chunks(reader, chunk_size):
+      edges.append(
+        [ row[source] for row in chunk ],
+        [ row[target] for row in chunk ],
+        [ row.get(weight) for row in chunk ])
+
+  return edges.build(compact)
+
+
+def _tag(element):
+  return element.tag.rsplit('}', 1)[-1]
+
+
+# Streaming reader for plain GraphML: <node> and <edge> elements, the edge
+# weight is the <data> whose key is declared with attr.name == weight. Parsed
+# elements are dropped from the tree once per chunk to keep memory flat.
+def read_graphml(filename, weight='weight', default_weight=0, chunk_size=65536, compact=False):
+  edges = _EdgeChunks(default_weight)
+  weight_keys = set()
+  sources, destinations, weights = [], [], []
+  parents = []
+  parsed = 0
+
+  for event, element in ElementTree.iterparse(filename, events=('start', 'end')):
+    tag = _tag(element)
+
+    if event == 'start':
+      if tag == 'graph':
+        parents.append(element)
+      continue
+
+    if tag == 'key':
+      if element.get('attr.name') == weight and element.get('for', 'all') in ('edge', 'all'):
+        weight_keys.add(element.get('id'))
+    elif tag == 'node':
+      edges.index.id(element.get('id'))
+      parsed += 1
+    elif tag == 'edge':
+      if element.get('source') is None or element.get('target') is None:
+        raise GraphImportError("GraphML edge without source or target")
+
+      value = None
+      for data in element:
+        if _tag(data) == 'data' and data.get('key') in weight_keys:
+          value = data.text
+
+      edges.index.id(element.get('source'))
+      edges.index.id(element.get('target'))
+      sources.append(element.get('source'))
+      destinations.append(element.get('target'))
+      weights.append(value)
+      parsed += 1
+
+    if parsed >= chunk_size:
+      edges.append(sources, destinations, weights)
+      sources, destinations, weights = [], [], []
+      parsed = 0
+      for parent in parents:
+        del parent[:]
+
+  edges.append(sources, destinations, weights)
+  return edges.build(compact)
+
+
+_EXTENSIONS = {
+  '.csv': GraphFormat.CSV,
+  '.graphml': GraphFormat.GRAPHML,
+  '.xml': GraphFormat.GRAPHML,
+}
+
+
+# Returns (graph, labels): graph nodes are numbered 0..size - 1 and labels[id]
+# is the original label of a node. The format is guessed from the extension
+# unless given; options are passed to the matching reader.
+def import_graph(filename, format=None, compact=False, **options):
+  if format is None:
+    format = _EXTENSIONS.get(os.path.splitext(filename)[1].lower(), GraphFormat.EDGE_LIST)
+
+  if format == GraphFormat.CSV:
+    return read_csv(filename, compact=compact, **options)
+  elif format == GraphFormat.GRAPHML:
+    return read_graphml(filename, compact=compact, **options)
+  else:
+    return read_edge_list(filename, compact=compact, **options)
@@ -0,0 +1,110 @@
+from ..graph import GraphInternalError
+from ..compact import CompactGraph
+import numpy as np
+import math
+
+
+# Dense all-pairs shortest paths for small and medium graphs. The distance
+# matrix and the next-hop matrix (next_hops[i, j] is the node following i on
+# a shortest i -> j route, -1 if j is unreachable) are built by a vectorized
+# Floyd-Warshall: one rank-1 min-plus update of the whole matrix per pivot.
+# Matrices are indexed by node position, see CompactGraph.node_ids: for a
+# Graph positions follow the CompactGraph it is converted to.
+class AllPairsShortestPaths:
+  def __init__(self, graph, distances, next_hops, node_ids=None):
+    self._graph = graph
+    self._version = graph.version
+    if isinstance(graph, CompactGraph):
+      self._node_ids = None
+    else:
+      self._node_ids = (CompactGraph.from_graph(graph).node_ids if node_ids is None else node_ids).tolist()
+    self._positions = None if self._node_ids is None else { node_id: idx for idx, node_id in enumerate(self._node_ids) }
+    self._distances = distances
+    self._next_hops = next_hops
+
+    if distances.shape != (graph.size, graph.size) or next_hops.shape != distances.shape:
+      raise GraphInternalError("All pairs matrices do not match the graph size")
+
+  @staticmethod
+  def build(graph, max_size=4096, dtype=np.float64):
+    if graph.size > max_size:
+      raise GraphInternalError(f"Graph of size {graph.size} exceeds the all pairs limit {max_size}")
+
+    compact = graph if isinstance(graph, CompactGraph) else CompactGraph.from_graph(graph)
+    size = compact.size
+    index_dtype = np.int32 if size < np.iinfo(np.int32).max else np.int64
+
+    distances = np.full((size, size), math.inf, dtype=dtype)
+    next_hops = np.full((size, size), -1, dtype=index_dtype)
+
+    heads = np.repeat(np.arange(size, dtype=np.int64), compact.degrees)
+    tails = compact.neighbors
+    distances[heads, tails] = compact.weights
+    next_hops[heads, tails] = tails
+
+    diagonal = np.arange(size)
+    distances[diagonal, diagonal] = 0
+    next_hops[diagonal, diagonal] = diagonal
+
+    candidate = np.empty_like(distances)
+    improved = np.empty((size, size), dtype=bool)
+    for pivot in range(size):
+      np.add(distances[:, pivot, None], distances[None, pivot, :], out=candidate)
+      np.less(candidate, distances, out=improved)
+      np.copyto(distances, candidate, where=improved)
+      np.copyto(next_hops, np.broadcast_to(next_hops[:, pivot, None], next_hops.shape), where=improved)
+
+    return AllPairsShortestPaths(graph, distances, next_hops, node_ids=compact.node_ids)
+
+  @property
+  def distances(self):
+    return self._distances
+
+  @property
+  def next_hops(self):
+    return self._next_hops
+
+  # Matrices are only valid for the graph they were computed on
+  @property
+  def stale(self):
+    return self._version != self._graph.version
+
+  def __position(self, node_id):
+    if node_id not in self._graph:
+      raise GraphInternalError(f"Node with id {node_id} does not belong to the graph")
+    if self.stale:
+      raise GraphInternalError("All pairs matrices are stale: the graph changed after they were built")
+    return node_id if self._positions is None else self._positions[node_id]
+
+  def __node_id(self, position):
+    return position if self._node_ids is None else self._node_ids[position]
+
+  def distance(self, src_id, dest_id):
+    return self._distances[self.__position(src_id), self.__position(dest_id)].item()
+
+  def path_ids(self, src_id, dest_id):
+    position = self.__position(src_id)
+    dest = self.__position(dest_id)
+    if self._next_hops[position, dest] < 0:
+      return None
+
+    path = [ position ]
+    while position != dest:
+      position = int(self._next_hops[position, dest])
+      path.append(position)
+
+    return [ self.__node_id(position) for position in path ]
+
+  def get_shortest_path(self, src_id, dest_id):
+    path = self.path_ids(src_id, dest_id)
+    if path is None:
+      return ([ None ], math.inf)
+    return ([ self._graph.get_node(node_id) for node_id in path ], self.distance(src_id, dest_id))
+
+  def save_to_file(self, filename="paths.npz"):
+    np.savez(filename, distances=self._distances, next_hops=self._next_hops)
+
+  @staticmethod
+  def load(filename, graph):
+    with np.load(filename) as data:
+      return AllPairsShortestPaths(graph, data['distances'], data['next_hops'])
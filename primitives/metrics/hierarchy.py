@@ -0,0 +1,200 @@
+from ..graph import GraphInternalError
+import heapq
+import math
+
+
+# Contraction hierarchy over an undirected graph. Nodes are contracted one by
+# one in order of their edge difference (the same shortcut insertion as
+# Graph.delete_node, but only where no witness path exists); every contracted
+# node keeps its edges towards the nodes contracted after it. A query is a
+# bidirectional Dijkstra that only climbs to higher ranked nodes, shortcuts
+# are unpacked through the node they bypass.
+class ContractionHierarchy:
+  def __init__(self, graph, witness_settle_limit=64):
+    self._graph = graph
+    self._version = graph.version
+    self._witness_settle_limit = witness_settle_limit
+    self._rank = dict()
+    self._upward = dict()
+    self._middle = dict()
+    self._shortcuts_count = 0
+
+    self.__build()
+
+  @property
+  def rank(self):
+    return self._rank
+
+  @property
+  def shortcuts_count(self):
+    return self._shortcuts_count
+
+  # Shortcuts are only valid for the graph they were contracted from
+  @property
+  def stale(self):
+    return self._version != self._graph.version
+
+  def __build(self):
+    adjacency = dict()
+    for node in self._graph:
+      adjacency[node.id] = { adjacent_id: weight for adjacent_id, weight in self._graph.weighted_adjacency(node.id) if adjacent_id != node.id }
+
+    contracted_neighbors = { node_id: 0 for node_id in adjacency }
+    queue = [ (self.__priority(adjacency, contracted_neighbors, node_id), node_id) for node_id in adjacency ]
+    heapq.heapify(queue)
+
+    while len(queue) > 0:
+      _, node_id = heapq.heappop(queue)
+
+      # lazy update: re-queue the node if it is no longer the cheapest one
+      priority = self.__priority(adjacency, contracted_neighbors, node_id)
+      if len(queue) > 0 and priority > queue[0][0]:
+        heapq.heappush(queue, (priority, node_id))
+        continue
+
+      self.__contract(adjacency, contracted_neighbors, node_id)
+
+  def __shortcuts(self, adjacency, node_id):
+    neighbors = list(adjacency[node_id].items())
+    shortcuts = []
+
+    for idx, (src_id, src_weight) in enumerate(neighbors):
+      targets = { dest_id: src_weight + dest_weight for dest_id, dest_weight in neighbors[idx + 1:] }
+      if len(targets) == 0:
+        continue
+
+      witnesses = self.__witness_search(adjacency, src_id, node_id, targets)
+      for dest_id, weight in targets.items():
+        if witnesses.get(dest_id, math.inf) > weight:
+          shortcuts.append((src_id, dest_id, weight))
+
+    return shortcuts
+
+  # Bounded Dijkstra from src that avoids the node being contracted
+  def __witness_search(self, adjacency, src_id, excluded_id, targets):
+    limit = max(targets.values())
+    pending = set(targets.keys())
+    distances = { src_id: 0 }
+    queue = [ (0, src_id) ]
+    settled = set()
+
+    while len(queue) > 0 and len(pending) > 0 and len(settled) < self._witness_settle_limit:
+      distance, node_id = heapq.heappop(queue)
+      if node_id in settled:
+        continue
+      if distance > limit:
+        break
+
+      settled.add(node_id)
+      pending.discard(node_id)
+
+      for adjacent_id, weight in adjacency[node_id].items():
+        candidate = distance + weight
+        if adjacent_id != excluded_id and candidate < distances.get(adjacent_id, math.inf):
+          distances[adjacent_id] = candidate
+          heapq.heappush(queue, (candidate, adjacent_id))
+
+    return distances
+
+  def __priority(self, adjacency, contracted_neighbors, node_id):
+    return len(self.__shortcuts(adjacency, node_id)) - len(adjacency[node_id]) + contracted_neighbors[node_id]
+
+  def __contract(self, adjacency, contracted_neighbors, node_id):
+    for src_id, dest_id, weight in self.__shortcuts(adjacency, node_id):
+      if weight < adjacency[src_id].get(dest_id, math.inf):
+        adjacency[src_id][dest_id] = weight
+        adjacency[dest_id][src_id] = weight
+        self._middle[(min(src_id, dest_id), max(src_id, dest_id))] = node_id
+        self._shortcuts_count += 1
+
+    self._rank[node_id] = len(self._rank)
+    self._upward[node_id] = adjacency[node_id]
+
+    for adjacent_id in adjacency[node_id]:
+      del adjacency[adjacent_id][node_id]
+      contracted_neighbors[adjacent_id] += 1
+    del adjacency[node_id]
+
+  # Stall on demand: a node reached cheaper through a higher ranked neighbor
+  # is not on a shortest up-down path, its edges are not relaxed
+  def __settle(self, distances, predecessors, queue):
+    distance, node_id = heapq.heappop(queue)
+    if distance > distances[node_id]:
+      return None
+
+    upward = self._upward[node_id]
+    for adjacent_id, weight in upward.items():
+      if distances.get(adjacent_id, math.inf) + weight < distance:
+        return node_id
+
+    for adjacent_id, weight in upward.items():
+      candidate = distance + weight
+      if candidate < distances.get(adjacent_id, math.inf):
+        distances[adjacent_id] = candidate
+        predecessors[adjacent_id] = node_id
+        heapq.heappush(queue, (candidate, adjacent_id))
+
+    return node_id
+
+  def query(self, src_id, dest_id):
+    if src_id not in self._rank or dest_id not in self._rank:
+      raise GraphInternalError(f"Nodes with id {src_id} or {dest_id} do not belong to the graph")
+    if self.stale:
+      raise GraphInternalError("Contraction hierarchy is stale: the graph changed after it was built")
+
+    forward = ({ src_id: 0 }, { src_id: None }, [ (0, src_id) ])
+    backward = ({ dest_id: 0 }, { dest_id: None }, [ (0, dest_id) ])
+    best = math.inf
+    meeting_id = None
+
+    # the side with the smaller queue head goes next, until neither can
+    # improve on the best meeting
+    while True:
+      forward_key = forward[2][0][0] if len(forward[2]) > 0 else math.inf
+      backward_key = backward[2][0][0] if len(backward[2]) > 0 else math.inf
+      if min(forward_key, backward_key) >= best:
+        break
+
+      search, other = (forward, backward) if forward_key <= backward_key else (backward, forward)
+      distances, predecessors, queue = search
+      node_id = self.__settle(distances, predecessors, queue)
+      if node_id is not None and node_id in other[0] and distances[node_id] + other[0][node_id] < best:
+        best = distances[node_id] + other[0][node_id]
+        meeting_id = node_id
+
+    if meeting_id is None:
+      return (math.inf, None)
+
+    up = self.__chain(forward[1], meeting_id)
+    down = self.__chain(backward[1], meeting_id)
+    up.reverse()
+    return (best, self.__unpack(up + down[1:]))
+
+  @staticmethod
+  def __chain(predecessors, node_id):
+    chain = [ node_id ]
+    while predecessors[chain[-1]] is not None:
+      chain.append(predecessors[chain[-1]])
+    return chain
+
+  def __unpack(self, path):
+    unpacked = [ path[0] ]
+    stack = [ (path[idx], path[idx + 1]) for idx in range(len(path) - 2, -1, -1) ]
+
+    while len(stack) > 0:
+      src_id, dest_id = stack.pop()
+      middle_id = self._middle.get((min(src_id, dest_id), max(src_id, dest_id)))
+
+      if middle_id is None:
+        unpacked.append(dest_id)
+      else:
+        stack.append((middle_id, dest_id))
+        stack.append((src_id, middle_id))
+
+    return unpacked
+
+  def get_shortest_path(self, src_id, dest_id):
+    distance, path = self.query(src_id, dest_id)
+    if path is None:
+      return ([ None ], math.inf)
+    return ([ self._graph.get_node(node_id) for node_id in path ], distance)
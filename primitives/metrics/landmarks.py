@@ -0,0 +1,140 @@
+from ..graph import GraphInternalError
+from ..compact import CompactGraph
+from .paths import shortest_path_tree
+import numpy as np
+import random
+import heapq
+import math
+
+
+# ALT (A*, landmarks, triangle inequality) point-to-point routing. For every
+# landmark L the index keeps d(L, v) for all nodes, and
+#   max_L |d(L, v) - d(L, t)| <= d(v, t)
+# is a consistent A* heuristic, so a query only settles the nodes lying
+# roughly between source and destination.
+class LandmarkIndex:
+  def __init__(self, graph, landmarks_count=8, landmarks=None, seed=None):
+    self._graph = graph
+    self._version = graph.version
+    self._node_ids = [ node.id for node in graph ] if not isinstance(graph, CompactGraph) else None
+    self._positions = None if self._node_ids is None else { node_id: idx for idx, node_id in enumerate(self._node_ids) }
+    self._last_settled = 0
+
+    if landmarks is None:
+      landmarks = self.__select_landmarks(min(landmarks_count, graph.size), random.Random(seed))
+    else:
+      for landmark in landmarks:
+        if landmark not in graph:
+          raise GraphInternalError(f"Landmark {landmark} does not belong to the graph")
+
+    self._landmarks = list(landmarks)
+    self._distances = np.full((graph.size, len(self._landmarks)), math.inf)
+    for idx, landmark in enumerate(self._landmarks):
+      self._distances[:, idx] = self.__distance_column(landmark)
+
+  @property
+  def landmarks(self):
+    return self._landmarks
+
+  @property
+  def distances(self):
+    return self._distances
+
+  @property
+  def last_settled(self):
+    return self._last_settled
+
+  # Distances to landmarks are only valid for the graph they were computed on
+  @property
+  def stale(self):
+    return self._version != self._graph.version
+
+  def __check_version(self):
+    if self.stale:
+      raise GraphInternalError("Landmark index is stale: the graph changed after it was built")
+
+  def __position(self, node_id):
+    return node_id if self._positions is None else self._positions[node_id]
+
+  def __distance_column(self, landmark):
+    column = np.full(self._graph.size, math.inf)
+    tree = shortest_path_tree(self._graph, landmark)
+    for node_id, distance in tree.distances.items():
+      column[self.__position(node_id)] = distance
+    return column
+
+  # Farthest point selection: every next landmark is the node farthest from
+  # the ones already chosen; unreached components are seeded first.
+  def __select_landmarks(self, count, generator):
+    if count == 0:
+      return []
+
+    node_ids = list(range(self._graph.size)) if self._node_ids is None else self._node_ids
+    landmarks = [ generator.choice(node_ids) ]
+    nearest = self.__distance_column(landmarks[0])
+
+    while len(landmarks) < count:
+      unreached = np.nonzero(np.isinf(nearest))[0]
+      candidate = unreached[0] if len(unreached) > 0 else int(np.argmax(nearest))
+      if nearest[candidate] == 0:
+        break
+
+      landmarks.append(node_ids[candidate])
+      nearest = np.minimum(nearest, self.__distance_column(landmarks[-1]))
+
+    return landmarks
+
+  def lower_bound(self, src_id, dest_id):
+    self.__check_version()
+    return self.__bound(self._distances[self.__position(src_id)].tolist(), self._distances[self.__position(dest_id)].tolist())
+
+  @staticmethod
+  def __bound(src_distances, dest_distances):
+    bound = 0
+    for a, b in zip(src_distances, dest_distances):
+      if a != b:
+        bound = max(bound, abs(a - b))
+    return bound
+
+  def get_shortest_path(self, src_id, dest_id):
+    graph = self._graph
+    if src_id not in graph or dest_id not in graph:
+      raise GraphInternalError(f"Nodes with id {src_id} or {dest_id} do not belong to the graph")
+    self.__check_version()
+
+    dest_distances = self._distances[self.__position(dest_id)].tolist()
+    tentative = { src_id: 0 }
+    predecessors = { src_id: None }
+    settled = set()
+    queue = [ (self.__bound(self._distances[self.__position(src_id)].tolist(), dest_distances), 0, src_id) ]
+
+    while len(queue) > 0:
+      _, distance, node_id = heapq.heappop(queue)
+      if node_id in settled:
+        continue
+
+      settled.add(node_id)
+      if node_id == dest_id:
+        break
+
+      for adjacent_id, weight in graph.weighted_adjacency(node_id):
+        candidate = distance + weight
+        if adjacent_id not in settled and candidate < tentative.get(adjacent_id, math.inf):
+          bound = self.__bound(self._distances[self.__position(adjacent_id)].tolist(), dest_distances)
+          if math.isinf(bound):
+            continue
+
+          tentative[adjacent_id] = candidate
+          predecessors[adjacent_id] = node_id
+          heapq.heappush(queue, (candidate + bound, candidate, adjacent_id))
+
+    self._last_settled = len(settled)
+    if dest_id not in settled:
+      return ([ None ], math.inf)
+
+    path = [ dest_id ]
+    while path[-1] != src_id:
+      path.append(predecessors[path[-1]])
+    path.reverse()
+
+    return ([ graph.get_node(node_id) for node_id in path ], tentative[dest_id])
@@ -1,7 +1,15 @@
 from ..graph import Graph, GraphInternalError
+from ..compact import CompactGraph
+from ..properties import NodePropertyMap
+from .traversal import depth_first_search
 from enum import Enum
-import copy
+from collections import OrderedDict
+from statistics import NormalDist
+import numpy as np
+import random
+import heapq
 import math
+import time
 
 
 class NodeColor(Enum):
@@ -10,150 +18,416 @@ class NodeColor(Enum):
   BLACK = 2,
 
 
+# Returns (order, parent), see traversal.depth_first_search
 def deep_first_search(graph):
-  g = copy.deepcopy(graph)
+  return depth_first_search(graph)
 
-  for node in g:
-    node.attribute['color'] = NodeColor.WHITE
-    node.attribute['parent'] = None
 
-  for node in g:
-    if node.attribute['color'] == NodeColor.WHITE:
-      _dfs_visit(g, node)
+def find_paths(graph, src_id, dest_id):
+  return list(iter_paths(graph, src_id, dest_id))
 
 
-def _dfs_visit(graph, node):
-  node.attribute['color'] = NodeColor.GRAY
+# Lazily yields simple src -> dest paths as lists of node ids. The search
+# is pruned by path length (edges), path weight, number of yielded paths and
+# a wall-clock budget in seconds. With `ordered` the paths come out in
+# non-decreasing weight (best-first search, weights must be non-negative).
+def iter_paths(graph, src_id, dest_id, max_length=None, max_count=None, max_weight=None, time_budget=None, ordered=False):
+  if src_id not in graph or dest_id not in graph:
+    raise GraphInternalError(f"Nodes with id {src_id} or {dest_id} do not belong to the graph")
 
-  for adjacment_node in graph.adjacent_nodes(node.id):
-    if adjacment_node.attribute['color'] == NodeColor.WHITE:
-      adjacment_node.attribute['parent'] = node.id
-      _dfs_visit(graph, adjacment_node)
-  
-  node.attribute['color'] = NodeColor.BLACK
+  max_length = math.inf if max_length is None else max_length
+  max_count = math.inf if max_count is None else max_count
+  max_weight = math.inf if max_weight is None else max_weight
+  deadline = math.inf if time_budget is None else time.monotonic() + time_budget
 
+  if ordered:
+    return _iter_paths_ordered(graph, src_id, dest_id, max_length, max_count, max_weight, deadline)
+  return _iter_paths_dfs(graph, src_id, dest_id, max_length, max_count, max_weight, deadline)
 
-# Deep first search based 
-def find_paths(graph, src_id, dest_id):
-  g = copy.deepcopy(graph)
 
-  for node in g:
-    node.attribute['visited'] = False
+def _iter_paths_dfs(graph, src_id, dest_id, max_length, max_count, max_weight, deadline):
+  if src_id == dest_id:
+    if max_count > 0:
+      yield [ src_id ]
+    return
 
-  src = g.get_node(src_id)
-  dest = g.get_node(dest_id)
+  count = 0
+  path = [ src_id ]
+  weights = [ 0 ]
+  on_path = { src_id }
+  stack = [ iter(graph.weighted_adjacency(src_id)) ]
 
-  if src is None or dest is None:
-    raise GraphInternalError(f"Nodes with id {src_id} or {dest_id} do not belong to the graph")
+  while len(stack) > 0 and count < max_count and time.monotonic() < deadline:
+    node_id, weight = next(stack[-1], (None, None))
 
-  return _find_paths(g, src, dest, path=[], paths = [])
+    if node_id is None:
+      stack.pop()
+      on_path.discard(path.pop())
+      weights.pop()
+      continue
 
+    total = weights[-1] + weight
+    if node_id in on_path or total > max_weight or len(path) > max_length:
+      continue
 
-def _find_paths(graph, src, dest, path=[], paths=[]):
-  src.attribute['visited'] = True
-  path.append(src.id)
+    if node_id == dest_id:
+      count += 1
+      yield path + [ node_id ]
+      continue
 
-  if src == dest:
-    paths.append(path)
+    if len(path) < max_length:
+      path.append(node_id)
+      weights.append(total)
+      on_path.add(node_id)
+      stack.append(iter(graph.weighted_adjacency(node_id)))
 
-  for node in graph.adjacent_nodes(src.id):
-    if not node.attribute['visited']:
-      _find_paths(graph, node, dest, path.copy(), paths)
 
-  src.attribute['visited'] = False
-  return paths
+def _iter_paths_ordered(graph, src_id, dest_id, max_length, max_count, max_weight, deadline):
+  count = 0
+  sequence = 0
+  queue = [ (0, sequence, (src_id,)) ]
 
+  while len(queue) > 0 and count < max_count and time.monotonic() < deadline:
+    total, _, path = heapq.heappop(queue)
+    node_id = path[-1]
 
-# Deep first search based 
-def count_paths(graph, src_id, dest_id):
-  g = copy.deepcopy(graph)
+    if node_id == dest_id:
+      count += 1
+      yield list(path)
+      continue
 
-  for node in g:
-    node.attribute['visited'] = False
+    if len(path) > max_length:
+      continue
 
-  src = g.get_node(src_id)
-  dest = g.get_node(dest_id)
+    for adjacent_id, weight in graph.weighted_adjacency(node_id):
+      candidate = total + weight
+      if candidate > max_weight or adjacent_id in path:
+        continue
+      if adjacent_id != dest_id and len(path) == max_length:
+        continue
 
-  if src is None or dest is None:
+      sequence += 1
+      heapq.heappush(queue, (candidate, sequence, path + (adjacent_id,)))
+
+
+# Deep first search based, the visited marks live in a property map so the
+# graph itself is neither copied nor modified
+def count_paths(graph, src_id, dest_id):
+  if src_id not in graph or dest_id not in graph:
     raise GraphInternalError(f"Nodes with id {src_id} or {dest_id} do not belong to the graph")
 
-  return _count_paths(g, src, dest)
+  visited = NodePropertyMap(graph, dtype=bool, default=False)
+  return _count_paths(graph, visited.values, src_id, dest_id)
 
 
-def _count_paths(graph, src, dest, acc = 0):
-  src.attribute['visited'] = True
+def _count_paths(graph, visited, src_id, dest_id):
+  acc = 0
+  visited[src_id] = True
+  stack = [ (src_id, iter(graph.weighted_adjacency(src_id))) ]
 
-  if src == dest:
-    acc = acc + 1
+  while len(stack) > 0:
+    node_id, adjacency = stack[-1]
+    if node_id == dest_id:
+      acc = acc + 1
+      adjacency = iter(())
 
-  for node in graph.adjacent_nodes(src.id):
-    if not node.attribute['visited']:
-      acc = _count_paths(graph, node, dest, acc)
+    next_edge = next(adjacency, None)
+    if next_edge is None:
+      visited[node_id] = False
+      stack.pop()
+    elif not visited[next_edge[0]]:
+      visited[next_edge[0]] = True
+      stack.append((next_edge[0], iter(graph.weighted_adjacency(next_edge[0]))))
 
-  src.attribute['visited'] = False
   return acc
 
 
-# Dijkstra shortest path
-def _initialize_single_source(graph, src_id):
-  g = copy.deepcopy(graph)
-  src = g.node(src_id)
+def _adjacency_matrix(graph, max_size, dtype):
+  compact = graph if isinstance(graph, CompactGraph) else CompactGraph.from_graph(graph)
+  if compact.size > max_size:
+    raise GraphInternalError(f"Graph of size {compact.size} exceeds the adjacency matrix limit {max_size}")
 
-  for node in g:
-    node.attribute['distance'] = math.inf
-    node.attribute['predecessor'] = None
+  heads = np.repeat(np.arange(compact.size), compact.degrees)
+  matrix = np.zeros((compact.size, compact.size), dtype=np.int64)
+  matrix[heads, compact.neighbors] = 1
+  return compact, matrix.astype(dtype)
 
-  src.attribute['distance'] = 0
-  return g
 
+def _dense_index(graph, compact, node_id):
+  if graph is compact:
+    return node_id
+  return int(np.searchsorted(compact.node_ids, node_id))
 
-def _relax(src, dest):
-  dest_next_upper_bound = src.attribute['distance'] + src.get_weight(dest.id)
-  if dest.attribute['distance'] > dest_next_upper_bound:
-    dest.attribute['distance'] = dest_next_upper_bound
-    dest.attribute['predecessor'] = src.id
 
+# Number of walks (vertices may repeat) of every length 0..max_length from src
+# to dest, taken from the src row of the adjacency matrix powers. Counts are
+# exact: the matrix switches to Python integers when int64 could overflow.
+def count_walks(graph, src_id, dest_id, max_length, max_size=4096):
+  if src_id not in graph or dest_id not in graph:
+    raise GraphInternalError(f"Nodes with id {src_id} or {dest_id} do not belong to the graph")
 
-def _extract_min(nodes):
-  minimal = nodes[0]
-  for node in nodes:
-    if node.attribute['distance'] <= minimal.attribute['distance']:
-      minimal = node
-  return minimal
+  size = graph.size
+  overflow = max_length > 0 and max_length * math.log2(max(size, 2)) >= 62
+  compact, matrix = _adjacency_matrix(graph, max_size, object if overflow else np.int64)
 
+  row = np.zeros(size, dtype=matrix.dtype)
+  row[_dense_index(graph, compact, src_id)] = 1
+  dest = _dense_index(graph, compact, dest_id)
 
-def _collect_shortest_path(graph, src, dest):
-  if src == dest:
-    return [ src ]
-  elif dest.attribute['predecessor'] is None:
-    return [ None ]
-  else:
-    predecessor_id = dest.attribute['predecessor']
-    prev_path = _collect_shortest_path(graph, src, graph.get_node(predecessor_id))
-    return prev_path + [ dest ]
+  counts = [ int(row[dest]) ]
+  for _ in range(max_length):
+    row = row @ matrix
+    counts.append(int(row[dest]))
 
+  return counts
 
-def _dijkstra(graph, src_id):
-  g = _initialize_single_source(graph, src_id)
-  
-  nodes = list(g.nodes)
-  while len(nodes) > 0:
-    node = _extract_min(nodes)
-    nodes.remove(node)
-    
-    for adjacent_node in g.adjacent_nodes(node.id):
-      _relax(node, adjacent_node)
-    
-  return g
-
-
-def get_shortest_path(graph, src_id, dest_id):
-  g = _dijkstra(graph, src_id)
-  src = g.node(src_id)
-  dest = g.node(dest_id)
-  path = _collect_shortest_path(g, src, dest)
-  distance = dest.attribute['distance']
-  return (path, distance)
+
+# Exact number of src -> dest paths once every edge is oriented from the
+# lower to the higher position in `order` (node ids by default), which turns
+# the graph into a DAG. Linear in the graph size.
+def count_dag_paths(graph, src_id, dest_id, order=None):
+  if src_id not in graph or dest_id not in graph:
+    raise GraphInternalError(f"Nodes with id {src_id} or {dest_id} do not belong to the graph")
+
+  order = sorted(node.id for node in graph) if order is None else list(order)
+  rank = { node_id: idx for idx, node_id in enumerate(order) }
+  if len(rank) != graph.size:
+    raise GraphInternalError("Order should contain every node of the graph exactly once")
+
+  counts = { src_id: 1 }
+  for node_id in order[rank[src_id]:rank[dest_id] + 1]:
+    acc = counts.get(node_id, 0)
+    if acc == 0:
+      continue
+
+    for adjacent_id, _ in graph.weighted_adjacency(node_id):
+      if rank[adjacent_id] > rank[node_id]:
+        counts[adjacent_id] = counts.get(adjacent_id, 0) + acc
+
+  return counts.get(dest_id, 0)
+
+
+class PathCountEstimate:
+  def __init__(self, value, lower, upper, samples):
+    self.value = value
+    self.lower = lower
+    self.upper = upper
+    self.samples = samples
+
+  def __repr__(self):
+    return f"{{ estimate:{self.value} interval:[{self.lower}, {self.upper}] samples:{self.samples} }}"
+
+
+# Knuth's estimator for the number of simple src -> dest paths: random
+# self-avoiding walks weighted by the product of their branching factors.
+# Sampling stops after `samples` walks or when `time_budget` seconds ran out,
+# at least one walk is always taken.
+def estimate_paths(graph, src_id, dest_id, samples=1000, time_budget=None, confidence=0.95, seed=None):
+  if src_id not in graph or dest_id not in graph:
+    raise GraphInternalError(f"Nodes with id {src_id} or {dest_id} do not belong to the graph")
+
+  if samples < 1:
+    raise GraphInternalError(f"Number of samples should be positive, got {samples}")
+
+  if src_id == dest_id:
+    return PathCountEstimate(1, 1, 1, 0)
+
+  generator = random.Random(seed)
+  deadline = None if time_budget is None else time.monotonic() + time_budget
+  values = []
+
+  while len(values) < samples:
+    if deadline is not None and len(values) > 0 and time.monotonic() > deadline:
+      break
+
+    visited = { src_id }
+    node_id = src_id
+    weight = 1
+
+    while True:
+      candidates = [ adjacent_id for adjacent_id, _ in graph.weighted_adjacency(node_id) if adjacent_id not in visited ]
+      if len(candidates) == 0:
+        weight = 0
+        break
+
+      weight *= len(candidates)
+      node_id = generator.choice(candidates)
+      if node_id == dest_id:
+        break
+      visited.add(node_id)
+
+    values.append(weight)
+
+  mean = sum(values) / len(values)
+  variance = sum((value - mean) ** 2 for value in values) / max(len(values) - 1, 1)
+  margin = NormalDist().inv_cdf((1 + confidence) / 2) * math.sqrt(variance / len(values))
+  return PathCountEstimate(mean, max(mean - margin, 0), mean + margin, len(values))
+
+
+# Dijkstra shortest path (binary heap, lazy deletion). Distances and
+# predecessors live in dicts keyed by node id, the graph is never copied.
+class ShortestPathTree:
+  def __init__(self, graph, src_id, distances, predecessors):
+    self._graph = graph
+    self._src_id = src_id
+    self._distances = distances
+    self._predecessors = predecessors
+
+  @property
+  def source(self):
+    return self._src_id
+
+  @property
+  def distances(self):
+    return self._distances
+
+  @property
+  def predecessors(self):
+    return self._predecessors
+
+  def reachable(self, dest_id):
+    return dest_id in self._distances
+
+  def distance(self, dest_id):
+    return self._distances.get(dest_id, math.inf)
+
+  def path_ids(self, dest_id):
+    if dest_id not in self._distances:
+      return None
+
+    path = [ dest_id ]
+    while path[-1] != self._src_id:
+      path.append(self._predecessors[path[-1]])
+    path.reverse()
+    return path
+
+  def path(self, dest_id):
+    path_ids = self.path_ids(dest_id)
+    if path_ids is None:
+      return ([ None ], math.inf)
+    return ([ self._graph.get_node(node_id) for node_id in path_ids ], self._distances[dest_id])
+
+
+# Only settled nodes end up in the tree. With `targets` the search stops as
+# soon as all of them are settled. `blocked` nodes are settled but never
+# expanded (unless it is the source), so the tree only holds routes that do
+# not pass through them.
+def shortest_path_tree(graph, src_id, targets=None, blocked=None):
+  if src_id not in graph:
+    raise GraphInternalError(f"Node with id {src_id} does not belong to the graph")
+
+  pending = None if targets is None else set(targets)
+  tentative = { src_id: 0 }
+  distances = dict()
+  predecessors = { src_id: None }
+  queue = [ (0, src_id) ]
+
+  while len(queue) > 0:
+    distance, node_id = heapq.heappop(queue)
+    if node_id in distances:
+      continue
+
+    distances[node_id] = distance
+    if pending is not None:
+      pending.discard(node_id)
+      if len(pending) == 0:
+        break
+
+    if blocked is not None and node_id in blocked and node_id != src_id:
+      continue
+
+    for adjacent_id, weight in graph.weighted_adjacency(node_id):
+      candidate = distance + weight
+      if adjacent_id not in distances and candidate < tentative.get(adjacent_id, math.inf):
+        tentative[adjacent_id] = candidate
+        predecessors[adjacent_id] = node_id
+        heapq.heappush(queue, (candidate, adjacent_id))
+
+  return ShortestPathTree(graph, src_id, distances, predecessors)
+
+
+# Bounded LRU cache of full shortest path trees keyed by source, usable as a
+# routing index. Trees are dropped whenever the graph version changes.
+class ShortestPathTreeCache:
+  def __init__(self, graph, capacity=32):
+    if capacity < 1:
+      raise GraphInternalError(f"Shortest path tree cache capacity should be positive, got {capacity}")
+
+    self._graph = graph
+    self._capacity = capacity
+    self._trees = OrderedDict()
+    self._version = graph.version
+    self._hits = 0
+    self._misses = 0
+
+  @property
+  def capacity(self):
+    return self._capacity
+
+  @property
+  def hits(self):
+    return self._hits
+
+  @property
+  def misses(self):
+    return self._misses
+
+  def __len__(self):
+    return len(self._trees)
+
+  def __contains__(self, src_id):
+    return self._version == self._graph.version and src_id in self._trees
+
+  def invalidate(self):
+    self._trees.clear()
+    self._version = self._graph.version
+
+  def tree(self, src_id):
+    if self._version != self._graph.version:
+      self.invalidate()
+
+    tree = self._trees.get(src_id)
+    if tree is not None:
+      self._hits += 1
+      self._trees.move_to_end(src_id)
+      return tree
+
+    self._misses += 1
+    tree = shortest_path_tree(self._graph, src_id)
+    self._trees[src_id] = tree
+    if len(self._trees) > self._capacity:
+      self._trees.popitem(last=False)
+    return tree
+
+  def get_shortest_path(self, src_id, dest_id):
+    if dest_id not in self._graph:
+      raise GraphInternalError(f"Node with id {dest_id} does not belong to the graph")
+    return self.tree(src_id).path(dest_id)
+
+
+def get_shortest_paths(graph, src_id, dest_ids):
+  for dest_id in dest_ids:
+    if dest_id not in graph:
+      raise GraphInternalError(f"Node with id {dest_id} does not belong to the graph")
+
+  tree = shortest_path_tree(graph, src_id, targets=dest_ids)
+  return { dest_id: tree.path(dest_id) for dest_id in dest_ids }
+
+
+# `index` is an optional preprocessed routing index over the same graph
+# (LandmarkIndex, ContractionHierarchy, ...) that answers the query instead.
+def get_shortest_path(graph, src_id, dest_id, index=None):
+  if index is not None:
+    return index.get_shortest_path(src_id, dest_id)
+  return get_shortest_paths(graph, src_id, [ dest_id ])[dest_id]
+
+
+# Shortest distances from src to every other `via_nodes` member that can be
+# reached through nodes outside of `via_nodes` only.
+def get_direct_route_distances(graph, src_id, via_nodes):
+  via_nodes = via_nodes if isinstance(via_nodes, (set, frozenset)) else set(via_nodes)
+  tree = shortest_path_tree(graph, src_id, blocked=via_nodes)
+  return { node_id: distance for node_id, distance in tree.distances.items() if node_id in via_nodes and node_id != src_id }
 
 
 def get_shortest_of_paths(graph, paths):
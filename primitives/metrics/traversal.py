@@ -0,0 +1,134 @@
+from ..graph import GraphInternalError
+from ..compact import CompactGraph
+import numpy as np
+
+
+# Iterative traversals over the CSR arrays of a graph. Every result array is
+# indexed by node position (the node id itself unless a Graph has gaps in its
+# ids, see CompactGraph.node_ids) and holds node ids, -1 meaning "none".
+
+
+def _as_compact(graph):
+  return graph if isinstance(graph, CompactGraph) else CompactGraph.from_graph(graph)
+
+
+def _positions(graph, compact, node_ids):
+  node_ids = np.atleast_1d(np.asarray(node_ids, dtype=np.int64))
+  for node_id in node_ids.tolist():
+    if node_id not in graph:
+      raise GraphInternalError(f"Node with id {node_id} does not belong to the graph")
+
+  if graph is compact:
+    return node_ids
+  return np.searchsorted(compact.node_ids, node_ids)
+
+
+def _labels(graph, compact, positions):
+  if graph is compact:
+    return positions
+  return np.where(positions >= 0, compact.node_ids[np.maximum(positions, 0)], -1)
+
+
+# Frontier based multi-source BFS. Returns (order, parent, hops); nodes of
+# one level are ordered by discovery, so the result matches a FIFO queue BFS.
+def breadth_first_search(graph, src_ids):
+  compact = _as_compact(graph)
+  frontier = np.unique(_positions(graph, compact, src_ids))
+
+  hops = np.full(compact.size, -1, dtype=np.int64)
+  parent = np.full(compact.size, -1, dtype=np.int64)
+  hops[frontier] = 0
+  order = [ frontier ]
+  level = 0
+
+  while len(frontier) > 0:
+    level += 1
+    heads, tails = compact.expand(frontier)
+    fresh = hops[tails] == -1
+    heads, tails = heads[fresh], tails[fresh]
+
+    _, first = np.unique(tails, return_index=True)
+    first = np.sort(first)
+    frontier = tails[first]
+
+    hops[frontier] = level
+    parent[frontier] = heads[first]
+    order.append(frontier)
+
+  return _labels(graph, compact, np.concatenate(order)), _labels(graph, compact, parent), hops
+
+
+def hop_distances(graph, src_ids):
+  _, _, hops = breadth_first_search(graph, src_ids)
+  return hops
+
+
+# Explicit stack DFS in preorder. Without a source the whole graph is walked
+# as a forest, roots taken in id order. Returns (order, parent).
+def depth_first_search(graph, src_id=None):
+  compact = _as_compact(graph)
+  roots = range(compact.size) if src_id is None else _positions(graph, compact, src_id).tolist()
+
+  visited = bytearray(compact.size)
+  parent = np.full(compact.size, -1, dtype=np.int64)
+  order = []
+
+  for root in roots:
+    if visited[root]:
+      continue
+
+    visited[root] = 1
+    order.append(root)
+    stack = [ (root, iter(compact.adjacent_ids(root).tolist())) ]
+
+    while len(stack) > 0:
+      node, adjacent = stack[-1]
+      next_node = next(adjacent, None)
+
+      if next_node is None:
+        stack.pop()
+      elif not visited[next_node]:
+        visited[next_node] = 1
+        parent[next_node] = node
+        order.append(next_node)
+        stack.append((next_node, iter(compact.adjacent_ids(next_node).tolist())))
+
+  return _labels(graph, compact, np.asarray(order, dtype=np.int64)), _labels(graph, compact, parent)
+
+
+# Component label of every node of an edge list: edge endpoints are hooked
+# onto the smaller label and labels are shortcut by pointer jumping until no
+# edge crosses two labels. Labels are the smallest node of each component.
+def component_roots(size, sources, destinations):
+  labels = np.arange(0, size, dtype=np.int64)
+
+  while True:
+    label_a = labels[sources]
+    label_b = labels[destinations]
+    pending = label_a != label_b
+    if not pending.any():
+      return labels
+
+    np.minimum.at(labels, np.maximum(label_a, label_b)[pending], np.minimum(label_a, label_b)[pending])
+
+    while True:
+      jumped = labels[labels]
+      if np.array_equal(jumped, labels):
+        break
+      labels = jumped
+
+
+# Returns (labels, count) with component labels numbered 0..count - 1 in the
+# order of their smallest node.
+def connected_components(graph):
+  compact = _as_compact(graph)
+  heads = np.repeat(np.arange(compact.size, dtype=np.int64), compact.degrees)
+  roots = component_roots(compact.size, heads, compact.neighbors)
+
+  unique_roots, labels = np.unique(roots, return_inverse=True)
+  return labels.astype(np.int64), len(unique_roots)
+
+
+def is_connected(graph):
+  _, count = connected_components(graph)
+  return count <= 1
@@ -0,0 +1,103 @@
+import numpy as np
+from .graph import GraphInternalError
+from .compact import CompactGraph
+
+
+# Typed per-node storage kept outside of the graph. Values live in one numpy
+# array indexed by node id (ids of a Graph may have gaps, the array spans up to
+# the largest one), so algorithms allocate and reset their scratch state
+# without touching GraphNode.attribute or copying the graph.
+class NodePropertyMap:
+  def __init__(self, graph, dtype=np.float64, default=0):
+    self._graph = graph
+    self._default = default
+    self._values = np.full(NodePropertyMap.__id_bound(graph), default, dtype=dtype)
+
+  @staticmethod
+  def __id_bound(graph):
+    if isinstance(graph, CompactGraph):
+      return graph.size
+    return max((node.id for node in graph), default=-1) + 1
+
+  @property
+  def values(self):
+    return self._values
+
+  @property
+  def dtype(self):
+    return self._values.dtype
+
+  @property
+  def default(self):
+    return self._default
+
+  def __len__(self):
+    return len(self._values)
+
+  def __check(self, node_id):
+    if node_id not in self._graph:
+      raise GraphInternalError(f"Node with id {node_id} does not belong to the graph")
+
+  def __getitem__(self, node_id):
+    self.__check(node_id)
+    value = self._values[node_id]
+    return value.item() if isinstance(value, np.generic) else value
+
+  def __setitem__(self, node_id, value):
+    self.__check(node_id)
+    self._values[node_id] = value
+
+  def reset(self, value=None):
+    self._values.fill(self._default if value is None else value)
+
+  def items(self):
+    return [ (node.id, self[node.id]) for node in self._graph ]
+
+  def to_dict(self):
+    return dict(self.items())
+
+
+# Typed per-edge storage indexed by the CSR arc index of a CompactGraph, so
+# values line up with CompactGraph.neighbors and CompactGraph.weights. Both
+# arcs of an undirected edge are written together.
+class EdgePropertyMap:
+  def __init__(self, graph, dtype=np.float64, default=0):
+    if not isinstance(graph, CompactGraph):
+      raise GraphInternalError("Edge property maps are indexed by arcs of a CompactGraph")
+
+    self._graph = graph
+    self._default = default
+    self._values = np.full(len(graph.neighbors), default, dtype=dtype)
+
+  @property
+  def values(self):
+    return self._values
+
+  @property
+  def dtype(self):
+    return self._values.dtype
+
+  @property
+  def default(self):
+    return self._default
+
+  def __len__(self):
+    return len(self._values)
+
+  def index(self, node_a, node_b):
+    position = self._graph.arc_index(node_a, node_b)
+    if position is None:
+      raise GraphInternalError(f"Edge ({node_a}, {node_b}) does not belong to the graph")
+    return position
+
+  def __getitem__(self, edge):
+    value = self._values[self.index(*edge)]
+    return value.item() if isinstance(value, np.generic) else value
+
+  def __setitem__(self, edge, value):
+    node_a, node_b = edge
+    self._values[self.index(node_a, node_b)] = value
+    self._values[self.index(node_b, node_a)] = value
+
+  def reset(self, value=None):
+    self._values.fill(self._default if value is None else value)
@@ -0,0 +1,88 @@
+import os
+import struct
+import numpy as np
+from .graph import GraphInternalError
+from .compact import CompactGraph
+
+# Binary graph file, version 1. All integers are little endian.
+#
+#   header   magic (8s) | version (I) | flags (I) | size (Q) | arcs (Q) | weight dtype (8s) | reserved (24x)
+#   offsets  int64[size + 1]
+#   neighbors int64[arcs]
+#   weights  <weight dtype>[arcs], padded to 8 bytes
+#   node ids int64[size]           (only if FLAG_NODE_IDS is set)
+#
+# The arrays are the CSR layout of CompactGraph, so a file can be memory
+# mapped and queried without building anything.
+
+MAGIC = b'SSOGRAPH'
+VERSION = 1
+FLAG_NODE_IDS = 1 << 0
+
+_HEADER = struct.Struct('<8sIIQQ8s24x')
+_INDEX_DTYPE = np.dtype('<i8')
+
+
+def _aligned(nbytes):
+  return (nbytes + 7) // 8 * 8
+
+
+def is_graph_file(filename):
+  with open(filename, 'rb') as input:
+    return input.read(len(MAGIC)) == MAGIC
+
+
+def write_graph(graph, filename):
+  compact = graph if isinstance(graph, CompactGraph) else CompactGraph.from_graph(graph)
+
+  weights = np.asarray(compact.weights)
+  if weights.dtype.kind not in 'iuf':
+    raise GraphInternalError(f"Weights of type {weights.dtype} cannot be stored in a graph file")
+  weights = weights.astype(weights.dtype.newbyteorder('<'), copy=False)
+
+  flags = FLAG_NODE_IDS if compact._node_ids is not None else 0
+  header = _HEADER.pack(MAGIC, VERSION, flags, compact.size, len(weights), weights.dtype.str.encode('ascii'))
+
+  with open(filename, 'wb') as output:
+    output.write(header)
+    compact.offsets.astype(_INDEX_DTYPE, copy=False).tofile(output)
+    compact.neighbors.astype(_INDEX_DTYPE, copy=False).tofile(output)
+    weights.tofile(output)
+    output.write(b'\0' * (_aligned(weights.nbytes) - weights.nbytes))
+    if flags & FLAG_NODE_IDS:
+      compact.node_ids.astype(_INDEX_DTYPE, copy=False).tofile(output)
+
+
+def read_graph(filename, mmap=True):
+  with open(filename, 'rb') as input:
+    raw_header = input.read(_HEADER.size)
+
+  if len(raw_header) < _HEADER.size:
+    raise GraphInternalError(f"{filename} is not a graph file")
+
+  magic, version, flags, size, arcs, weight_dtype = _HEADER.unpack(raw_header)
+  if magic != MAGIC:
+    raise GraphInternalError(f"{filename} is not a graph file")
+  if version != VERSION:
+    raise GraphInternalError(f"Unsupported graph file version {version}")
+
+  weight_dtype = np.dtype(weight_dtype.rstrip(b'\0').decode('ascii'))
+
+  layout = [ ('offsets', _INDEX_DTYPE, size + 1), ('neighbors', _INDEX_DTYPE, arcs), ('weights', weight_dtype, arcs) ]
+  if flags & FLAG_NODE_IDS:
+    layout.append(('node_ids', _INDEX_DTYPE, size))
+
+  expected_size = _HEADER.size + sum(_aligned(dtype.itemsize * count) for _, dtype, count in layout)
+  if os.path.getsize(filename) != expected_size:
+    raise GraphInternalError(f"{filename} is truncated or corrupted")
+
+  arrays = dict()
+  offset = _HEADER.size
+  for name, dtype, count in layout:
+    if mmap and count > 0:
+      arrays[name] = np.memmap(filename, dtype=dtype, mode='r', offset=offset, shape=(count,))
+    else:
+      arrays[name] = np.fromfile(filename, dtype=dtype, count=count, offset=offset)
+    offset += _aligned(dtype.itemsize * count)
+
+  return CompactGraph(arrays['offsets'], arrays['neighbors'], arrays['weights'], node_ids=arrays.get('node_ids'))
@@ -0,0 +1,57 @@
+import math
+import numpy as np
+import pytest
+from primitives.graph import Graph, GraphGenerator, GraphInternalError
+from primitives.metrics.allpairs import AllPairsShortestPaths
+from primitives.metrics.paths import get_shortest_of_paths, get_shortest_path, shortest_path_tree
+
+
+# Node order of the graph differs from the sorted ids of its CompactGraph
+def test_distances_follow_node_ids_of_unsorted_graph():
+  graph = Graph.from_edges(5, [ 7, 2, 9, 4, 2 ], [ 2, 9, 4, 5, 5 ], [ 1, 10, 2, 3, 20 ], node_ids=[ 9, 2, 7, 5, 4 ])
+  node_ids = [ 2, 4, 5, 7, 9 ]
+
+  paths = AllPairsShortestPaths.build(graph)
+
+  for src in node_ids:
+    for dest in node_ids:
+      route, distance = get_shortest_path(graph, src, dest)
+      assert paths.distance(src, dest) == distance
+      assert paths.path_ids(src, dest)[0] == src
+      assert paths.path_ids(src, dest)[-1] == dest
+
+
+def test_stale_matrices_are_rejected():
+  graph = Graph(3)
+  graph.add_edge(0, 1, weight=1)
+  graph.add_edge(1, 2, weight=1)
+  paths = AllPairsShortestPaths.build(graph)
+  assert paths.distance(0, 2) == 2
+
+  graph.get_node(1).set_weight(5, 2)
+  graph.get_node(2).set_weight(5, 1)
+
+  assert paths.stale
+  with pytest.raises(GraphInternalError):
+    paths.distance(0, 2)
+
+
+def test_matrices_match_dijkstra_and_survive_a_round_trip(tmp_path):
+  np.random.seed(12)
+  graph = GraphGenerator.create(40, presets=('weighted',), average_degree=2)
+  graph.delete_node(7)
+  paths = AllPairsShortestPaths.build(graph)
+  filename = str(tmp_path / "paths.npz")
+  paths.save_to_file(filename)
+  loaded = AllPairsShortestPaths.load(filename, graph)
+
+  node_ids = [ node.id for node in graph ]
+  for src in node_ids:
+    tree = shortest_path_tree(graph, src)
+    for dest in node_ids:
+      assert paths.distance(src, dest) == loaded.distance(src, dest) == tree.distance(dest)
+      if tree.reachable(dest):
+        assert paths.path_ids(src, dest) == loaded.path_ids(src, dest)
+        assert get_shortest_of_paths(graph, [ paths.path_ids(src, dest) ]) == tree.distance(dest)
+      else:
+        assert paths.get_shortest_path(src, dest) == ([ None ], math.inf)
@@ -0,0 +1,44 @@
+import pytest
+
+from primitives.graph import Graph, GraphInternalError
+from primitives.compact import CompactGraph
+
+
+def edge_set(graph):
+  return { (min(a.id, b.id), max(a.id, b.id), a.get_weight(b.id)) for a, b in graph.edges }
+
+
+def test_from_edges_keeps_first_edge_and_sorts_neighbors():
+  compact = CompactGraph.from_edges(4, [ 2, 0, 1, 0, 3 ], [ 0, 1, 0, 2, 3 ], [ 5, 1, 9, 7, 4 ])
+
+  assert compact.offsets.tolist() == [ 0, 2, 3, 4, 5 ]
+  assert compact.adjacent_ids(0).tolist() == [ 1, 2 ]
+  assert compact.get_weight(0, 1) == 1
+  assert compact.get_weight(2, 0) == 5
+  assert compact.get_weight(3, 3) == 4
+  assert not compact.contains_edge(1, 2)
+
+  with pytest.raises(GraphInternalError):
+    compact.get_weight(1, 2)
+
+
+def test_round_trip_with_sparse_node_ids():
+  graph = Graph(5)
+  graph.add_edge(0, 1, weight=2)
+  graph.add_edge(1, 4, weight=3)
+  graph.add_edge(3, 4, weight=1)
+  graph.delete_node(2)
+
+  compact = CompactGraph.from_graph(graph)
+
+  assert compact.size == 4
+  assert compact.node_ids.tolist() == [ 0, 1, 3, 4 ]
+  assert edge_set(compact.to_graph()) == edge_set(graph)
+
+
+def test_expand_lists_arcs_of_the_frontier():
+  compact = CompactGraph.from_edges(4, [ 0, 0, 1, 2 ], [ 1, 2, 3, 3 ])
+  heads, tails = compact.expand([ 3, 0 ])
+
+  assert heads.tolist() == [ 3, 3, 0, 0 ]
+  assert tails.tolist() == [ 1, 2, 1, 2 ]
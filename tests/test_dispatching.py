@@ -0,0 +1,64 @@
+import pytest
+from primitives.graph import Graph
+from evaluation.dispatching import DomainOccupancy
+from evaluation.utils import EvaluationError
+
+
+def test_occupancy_tracks_objects_by_any_id():
+  occupancy = DomainOccupancy(Graph(4))
+  occupancy.enter("car", 2)
+  occupancy.enter(7, 1)
+  occupancy.leave("car", 2)
+  occupancy.enter("car", 3)
+
+  assert occupancy.domain_of("car") == 3
+  assert occupancy.domain_of(7) == 1
+  assert occupancy.domain_of("bus") is None
+  assert occupancy.domains_of([ 7, "bus", "car" ]).tolist() == [ 1, -1, 3 ]
+  assert list(occupancy.frame(3)) == [ "car" ]
+  assert occupancy.count(2) == 0
+
+
+def test_occupancy_reset_bumps_versions():
+  occupancy = DomainOccupancy(Graph(2))
+  occupancy.enter(0, 1)
+  version = occupancy.version(1)
+
+  occupancy.reset()
+
+  assert occupancy.version(1) > version
+  assert occupancy.domain_of(0) is None
+  assert occupancy.count(1) == 0
+
+
+class RecordingSubscriber:
+  def __init__(self):
+    self.events = []
+
+  def on_guest_enter(self, object_id):
+    self.events.append(("enter", object_id))
+
+  def on_guest_leave(self, object_id):
+    self.events.append(("leave", object_id))
+
+
+def test_occupancy_pushes_deltas_to_subscribers():
+  occupancy = DomainOccupancy(Graph(3))
+  subscriber = RecordingSubscriber()
+  occupancy.subscribe(1, subscriber)
+
+  occupancy.enter("car", 1)
+  occupancy.enter("bus", 2)
+  occupancy.leave("bus", 1)
+  occupancy.enter("bus", 1)
+  occupancy.leave("car", 1)
+  occupancy.reset()
+
+  assert subscriber.events == [ ("enter", "car"), ("enter", "bus"), ("leave", "car"), ("leave", "bus") ]
+
+  occupancy.unsubscribe(1, subscriber)
+  occupancy.enter("car", 1)
+  assert len(subscriber.events) == 4
+
+  with pytest.raises(EvaluationError):
+    occupancy.subscribe(5, subscriber)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from primitives.graph import GraphGenerator, GraphInternalError
+from primitives.compact import CompactGraph
+from primitives.metrics.traversal import is_connected
+
+
+def test_sparse_graph_has_requested_edges():
+  np.random.seed(3)
+  graph = GraphGenerator.create(200, average_degree=4)
+  compact = CompactGraph.from_graph(graph)
+
+  assert compact.size == 200
+  assert compact.degrees.sum() == 2 * 400
+  assert all(graph.contains_edge(i, i + 1) for i in range(199))
+  assert not any(graph.contains_edge(i, i) for i in range(200))
+  assert 1 <= compact.weights.min() and compact.weights.max() <= 100
+
+
+def test_sparse_graph_in_compact_form():
+  np.random.seed(4)
+  compact = GraphGenerator.create(50, presets=('weighted',), edges_count=60, compact=True)
+
+  assert isinstance(compact, CompactGraph)
+  assert compact.degrees.sum() == 2 * 60
+
+
+def test_sparse_graph_caps_average_degree():
+  compact = GraphGenerator.create(10, average_degree=100, compact=True)
+
+  assert compact.degrees.sum() == 2 * 45
+  with pytest.raises(GraphInternalError):
+    GraphGenerator.create(5, edges_count=11)
+
+
+def test_grid_links_right_and_lower_neighbours():
+  compact = GraphGenerator.create_grid(12, columns=4, compact=True)
+
+  assert is_connected(compact)
+  assert compact.adjacent_ids(5).tolist() == [ 1, 4, 6, 9 ]
+  assert compact.adjacent_ids(3).tolist() == [ 2, 7 ]
+  assert compact.degrees.sum() == 2 * (3 * 3 + 2 * 4)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_geometric_and_preferential_graphs_are_connected(seed):
+  np.random.seed(seed)
+
+  assert is_connected(GraphGenerator.create_geometric(300, average_degree=2, compact=True))
+  assert is_connected(GraphGenerator.create_geometric(50, average_degree=4))
+  assert is_connected(GraphGenerator.create_preferential(300, m=3, compact=True))
+  assert is_connected(GraphGenerator.create_preferential(50, m=1))
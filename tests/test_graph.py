@@ -0,0 +1,33 @@
+import os
+import pickle
+from primitives.graph import Graph
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+# Graph(4) with edges 0-1 (3), 1-2 (5), 2-3 (7) and a guest list on node 3,
+# pickled by Graph.save_to_file before GraphNode had __slots__
+def test_load_baseline_pickle():
+  graph = Graph.load(os.path.join(DATA_PATH, "baseline_graph.pkl"))
+
+  assert graph.size == 4
+  assert graph.version == 0
+  assert graph.contains_edge(1, 2)
+  assert graph.get_node(2).get_weight(3) == 7
+  assert graph.get_node(3).attribute == { 'guests': [ 1 ] }
+  assert { node.id for node in graph.nodes } == { 0, 1, 2, 3 }
+
+  graph.add_edge(0, 3, weight=1)
+  assert graph.version > 0
+
+
+def test_pickle_round_trip():
+  graph = Graph(3)
+  graph.add_edge(0, 1, weight=2)
+  graph.add_edge(1, 2, weight=4)
+
+  loaded = pickle.loads(pickle.dumps(graph, pickle.HIGHEST_PROTOCOL))
+
+  assert loaded.size == 3
+  assert loaded.version == graph.version
+  assert loaded.get_node(1).get_weight(2) == 4
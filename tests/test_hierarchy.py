@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from primitives.graph import Graph, GraphGenerator, GraphInternalError
+from primitives.metrics.hierarchy import ContractionHierarchy
+from primitives.metrics.paths import shortest_path_tree
+
+
+def test_stale_hierarchy_is_rejected():
+  graph = Graph(3)
+  graph.add_edge(0, 1, weight=1)
+  graph.add_edge(1, 2, weight=1)
+  hierarchy = ContractionHierarchy(graph)
+  assert not hierarchy.stale
+
+  graph.get_node(1).set_weight(5, 2)
+  graph.get_node(2).set_weight(5, 1)
+
+  assert hierarchy.stale
+  with pytest.raises(GraphInternalError):
+    hierarchy.get_shortest_path(0, 2)
+
+
+@pytest.mark.parametrize("witness_settle_limit", [ 1, 64 ])
+def test_routes_match_dijkstra(witness_settle_limit):
+  np.random.seed(10)
+  graph = GraphGenerator.create(120, presets=('weighted',), average_degree=3)
+  hierarchy = ContractionHierarchy(graph, witness_settle_limit=witness_settle_limit)
+
+  for src_id in range(0, 120, 17):
+    tree = shortest_path_tree(graph, src_id)
+    for dest_id in range(120):
+      route, distance = hierarchy.get_shortest_path(src_id, dest_id)
+
+      assert distance == tree.distance(dest_id)
+      if tree.reachable(dest_id):
+        path = [ node.id for node in route ]
+        assert path[0] == src_id and path[-1] == dest_id
+        assert sum(graph.get_node(x).get_weight(y) for x, y in zip(path, path[1:])) == distance
+      else:
+        assert route == [ None ]
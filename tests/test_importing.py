@@ -0,0 +1,69 @@
+import os
+import tempfile
+import pytest
+from primitives.importing import import_graph, read_edge_list, GraphFormat, GraphImportError
+from primitives.compact import CompactGraph
+
+
+def write_file(content, suffix):
+  handle, filename = tempfile.mkstemp(suffix=suffix)
+  with os.fdopen(handle, 'w') as output:
+    output.write(content)
+  return filename
+
+
+def test_edge_list_labels_follow_file_order():
+  filename = write_file("A B\nD\nB C\nC A\n", ".txt")
+
+  graph, labels = read_edge_list(filename)
+
+  assert labels == [ 'A', 'B', 'D', 'C' ]
+  assert graph.size == 4
+  assert graph.contains_edge(0, 1) and graph.contains_edge(1, 3) and graph.contains_edge(3, 0)
+  assert graph.adjacent_nodes(2) == []
+
+
+def test_edge_list_weights_and_comments():
+  filename = write_file("# header\nx y 2.5\ny z\n\nz x 4 # trailing\n", ".txt")
+
+  graph, labels = import_graph(filename, default_weight=1, compact=True)
+
+  assert isinstance(graph, CompactGraph)
+  assert labels == [ 'x', 'y', 'z' ]
+  assert graph.get_node(0).get_weight(1) == 2.5
+  assert graph.get_node(1).get_weight(2) == 1
+  assert graph.get_node(2).get_weight(0) == 4
+
+
+def test_csv_columns():
+  filename = write_file("from,to,cost\nb,a,3\na,c,5\n", ".csv")
+
+  graph, labels = import_graph(filename, source='from', target='to', weight='cost')
+
+  assert labels == [ 'b', 'a', 'c' ]
+  assert graph.get_node(0).get_weight(1) == 3
+  assert graph.get_node(1).get_weight(2) == 5
+
+
+def test_graphml_nodes_and_weights():
+  filename = write_file(
+    '<?xml version="1.0"?>\n'
+    '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+    '  <key id="w" for="edge" attr.name="weight" attr.type="double"/>\n'
+    '  <graph edgedefault="undirected">\n'
+    '    <node id="n1"/><node id="n0"/><node id="lonely"/>\n'
+    '    <edge source="n0" target="n1"><data key="w">7</data></edge>\n'
+    '  </graph>\n'
+    '</graphml>\n', ".graphml")
+
+  graph, labels = import_graph(filename)
+
+  assert labels == [ 'n1', 'n0', 'lonely' ]
+  assert graph.get_node(1).get_weight(0) == 7
+  assert graph.adjacent_nodes(2) == []
+
+
+def test_malformed_line():
+  filename = write_file("a b 1 extra\n", ".txt")
+  with pytest.raises(GraphImportError):
+    import_graph(filename, format=GraphFormat.EDGE_LIST)
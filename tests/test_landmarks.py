@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from primitives.graph import Graph, GraphGenerator, GraphInternalError
+from primitives.metrics.landmarks import LandmarkIndex
+from primitives.metrics.paths import shortest_path_tree
+
+
+def test_stale_index_is_rejected():
+  graph = Graph(3)
+  graph.add_edge(0, 1, weight=1)
+  graph.add_edge(1, 2, weight=1)
+  index = LandmarkIndex(graph, landmarks_count=2, seed=0)
+  assert not index.stale
+
+  graph.get_node(1).set_weight(5, 2)
+  graph.get_node(2).set_weight(5, 1)
+
+  assert index.stale
+  with pytest.raises(GraphInternalError):
+    index.get_shortest_path(0, 2)
+
+
+def test_routes_match_dijkstra():
+  np.random.seed(9)
+  graph = GraphGenerator.create(120, presets=('weighted',), average_degree=3)
+  index = LandmarkIndex(graph, landmarks_count=4, seed=1)
+
+  for src_id in range(0, 120, 17):
+    tree = shortest_path_tree(graph, src_id)
+    for dest_id in range(120):
+      route, distance = index.get_shortest_path(src_id, dest_id)
+
+      assert distance == tree.distance(dest_id)
+      assert index.lower_bound(src_id, dest_id) <= distance
+      if tree.reachable(dest_id):
+        path = [ node.id for node in route ]
+        assert path[0] == src_id and path[-1] == dest_id
+        assert sum(graph.get_node(x).get_weight(y) for x, y in zip(path, path[1:])) == distance
+      else:
+        assert route == [ None ]
@@ -0,0 +1,134 @@
+import math
+import numpy as np
+import pytest
+
+from primitives.graph import Graph, GraphGenerator, GraphInternalError
+from primitives.compact import CompactGraph
+from primitives.metrics.paths import ShortestPathTreeCache, count_dag_paths, count_paths, count_walks, estimate_paths, find_paths, iter_paths, get_shortest_of_paths, get_shortest_path, get_shortest_paths, shortest_path_tree
+
+
+def path_ids(route):
+  return [ node.id for node in route[0] ]
+
+
+def test_shortest_paths_match_exhaustive_search():
+  np.random.seed(5)
+  graph = GraphGenerator.create(9, average_degree=3)
+  tree = shortest_path_tree(graph, 0)
+
+  for dest_id in range(1, 9):
+    expected = get_shortest_of_paths(graph, find_paths(graph, 0, dest_id))
+    route, distance = get_shortest_path(graph, 0, dest_id)
+
+    assert tree.distance(dest_id) == distance == expected
+    assert route[0].id == 0 and route[-1].id == dest_id
+    assert get_shortest_of_paths(graph, [ [ node.id for node in route ] ]) == distance
+
+
+def test_shortest_paths_on_compact_graph_and_unreachable_nodes():
+  compact = CompactGraph.from_edges(4, [ 0, 1, 0 ], [ 1, 2, 2 ], [ 1, 1, 5 ])
+  paths = get_shortest_paths(compact, 0, [ 2, 3 ])
+
+  assert path_ids(paths[2]) == [ 0, 1, 2 ]
+  assert paths[2][1] == 2
+  assert paths[3] == ([ None ], math.inf)
+
+
+def test_tree_cache_follows_weights_set_through_nodes():
+  graph = Graph(3)
+  graph.add_edge(0, 1, weight=1)
+  graph.add_edge(1, 2, weight=1)
+  graph.add_edge(0, 2, weight=5)
+
+  cache = ShortestPathTreeCache(graph)
+  assert path_ids(cache.get_shortest_path(0, 2)) == [ 0, 1, 2 ]
+
+  graph.get_node(1).set_weight(10, 2)
+  graph.get_node(2).set_weight(10, 1)
+
+  assert 0 not in cache
+  assert cache.get_shortest_path(0, 2) == ([ graph.get_node(0), graph.get_node(2) ], 5)
+
+
+def test_estimate_paths_takes_at_least_one_sample():
+  graph = Graph(3)
+  graph.add_edge(0, 1, weight=1)
+  graph.add_edge(1, 2, weight=1)
+
+  with pytest.raises(GraphInternalError):
+    estimate_paths(graph, 0, 2, samples=0)
+
+  estimate = estimate_paths(graph, 0, 2, samples=10, time_budget=0, seed=1)
+  assert estimate.samples == 1
+  assert estimate.value == 1
+
+
+def complete_graph(size):
+  graph = Graph(size)
+  for x in range(size):
+    for y in range(x + 1, size):
+      graph.add_edge(x, y, weight=1)
+  return graph
+
+
+def test_count_walks_of_a_triangle():
+  # walks between two corners of a triangle: (2^k - (-1)^k) / 3
+  expected = [ (2 ** k - (-1) ** k) // 3 for k in range(71) ]
+
+  assert count_walks(complete_graph(3), 0, 1, 4) == expected[:5]
+  assert count_walks(complete_graph(3), 0, 1, 70) == expected
+
+
+def test_count_dag_paths_of_a_grid():
+  grid = GraphGenerator.create_grid(9, columns=3)
+
+  assert count_dag_paths(grid, 0, 8) == 6
+  assert count_dag_paths(grid, 8, 0) == 0
+  assert count_dag_paths(grid, 8, 0, order=range(8, -1, -1)) == 6
+
+  with pytest.raises(GraphInternalError):
+    count_dag_paths(grid, 0, 8, order=[ 0, 1, 2 ])
+
+
+def test_estimate_paths_of_a_complete_graph():
+  graph = complete_graph(5)
+  exact = count_paths(graph, 0, 4)
+  estimate = estimate_paths(graph, 0, 4, samples=4000, seed=7)
+
+  assert exact == 16
+  assert estimate.samples == 4000
+  assert estimate.lower <= exact <= estimate.upper
+  assert abs(estimate.value - exact) < 1
+
+
+def path_weight(graph, path):
+  return sum(graph.get_node(x).get_weight(y) for x, y in zip(path, path[1:]))
+
+
+def test_iter_paths_budgets():
+  graph = complete_graph(5)
+  graph.get_node(0).set_weight(10, 4)
+  graph.get_node(4).set_weight(10, 0)
+  all_paths = find_paths(graph, 0, 4)
+
+  assert len(all_paths) == 16
+  assert len(set(map(tuple, all_paths))) == 16
+  assert len(list(iter_paths(graph, 0, 4, max_count=5))) == 5
+  assert all(len(path) <= 3 for path in iter_paths(graph, 0, 4, max_length=2))
+  assert len(list(iter_paths(graph, 0, 4, max_length=2))) == 4
+  assert all(path_weight(graph, path) <= 3 for path in iter_paths(graph, 0, 4, max_weight=3))
+  assert len(list(iter_paths(graph, 0, 4, max_weight=3))) == 9
+  assert list(iter_paths(graph, 0, 4, time_budget=0)) == []
+
+
+def test_ordered_paths_come_by_weight():
+  graph = complete_graph(5)
+  graph.get_node(0).set_weight(10, 4)
+  graph.get_node(4).set_weight(10, 0)
+
+  weights = [ path_weight(graph, path) for path in iter_paths(graph, 0, 4, ordered=True) ]
+  assert len(weights) == 16
+  assert weights == sorted(weights)
+  assert weights[0] == 2
+
+  assert [ path_weight(graph, path) for path in iter_paths(graph, 0, 4, ordered=True, max_count=3) ] == weights[:3]
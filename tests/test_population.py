@@ -0,0 +1,47 @@
+import random
+import numpy as np
+
+from primitives.graph import GraphGenerator
+from evaluation.dispatching import SurveillanceObjectDispatcher
+from evaluation.objects import SurveillanceObject, generate_average_speeds
+from evaluation.population import ObjectPopulation
+from evaluation.transition import TransitionGenerator
+from evaluation.surveillance import BaseSurveillanceSystem
+
+
+def run_population(vectorized, seed, size, objects_count, speed, time_step, limit):
+  random.seed(seed)
+  np.random.seed(seed)
+
+  graph = GraphGenerator.create(size, min_weight=20, max_weight=100)
+  transitions = TransitionGenerator(size, min_group=2).get_samples(objects_count)
+  dispatcher = SurveillanceObjectDispatcher(graph, transitions=transitions, objects_count=objects_count)
+  dispatcher.reset()
+  speeds = generate_average_speeds(exp=speed, size=objects_count)
+
+  if vectorized:
+    population = ObjectPopulation(dispatcher, speeds, time_step=time_step)
+    population.enter_start_domains(0)
+    on_timetick = population.on_timetick
+    coordinates = lambda: [ population.coordinates(idx).get() for idx in range(objects_count) ]
+  else:
+    objects = [ SurveillanceObject(dispatcher, id=idx, average_speed=speeds[idx], time_step=time_step) for idx in range(objects_count) ]
+    for s_object in objects:
+      dispatcher.on_domain_enter(s_object.snapshot, s_object.coordinates.domain, 0)
+
+    def on_timetick(timetick):
+      for s_object in objects:
+        s_object.on_timetick(timetick)
+    coordinates = lambda: [ (s_object.coordinates.domain, float(np.squeeze(s_object.coordinates.offset))) for s_object in objects ]
+
+  reference = BaseSurveillanceSystem(graph, dispatcher.occupancy, supervised_object_ids=[ 0, 1 ])
+  for timetick in range(0, limit, time_step):
+    reference.on_timetick(timetick)
+    on_timetick(timetick)
+
+  return dispatcher.history, reference.history, coordinates()
+
+
+def test_population_matches_objects():
+  for options in [ dict(seed=3, size=8, objects_count=4, speed=10, time_step=1, limit=300), dict(seed=5, size=12, objects_count=10, speed=25, time_step=2, limit=301) ]:
+    assert run_population(True, **options) == run_population(False, **options)
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from primitives.graph import Graph, GraphInternalError
+from primitives.compact import CompactGraph
+from primitives.properties import EdgePropertyMap, NodePropertyMap
+
+
+def test_node_map_spans_ids_of_a_graph_with_gaps():
+  graph = Graph(4)
+  graph.delete_node(1)
+  visited = NodePropertyMap(graph, dtype=bool, default=False)
+
+  assert len(visited) == 4
+  visited[3] = True
+  assert visited[3] is True
+  assert visited.to_dict() == { 0: False, 2: False, 3: True }
+
+  visited.reset()
+  assert not visited.values.any()
+  visited.reset(True)
+  assert visited[0] is True
+
+  with pytest.raises(GraphInternalError):
+    visited[1]
+  with pytest.raises(GraphInternalError):
+    visited[4] = True
+
+
+def test_edge_map_writes_both_arcs():
+  compact = CompactGraph.from_edges(3, [ 0, 1 ], [ 1, 2 ], [ 4, 6 ])
+  flow = EdgePropertyMap(compact, dtype=np.int64, default=-1)
+
+  flow[(2, 1)] = 5
+  assert flow[(1, 2)] == flow[(2, 1)] == 5
+  assert flow[(0, 1)] == -1
+  assert flow.values.tolist() == [ -1, -1, 5, 5 ]
+  assert flow.values[flow.index(1, 2)] == 5 and compact.weights[flow.index(1, 2)] == 6
+
+  with pytest.raises(GraphInternalError):
+    flow[(0, 2)]
+  with pytest.raises(GraphInternalError):
+    EdgePropertyMap(Graph(2))
@@ -0,0 +1,64 @@
+import random
+import numpy as np
+from primitives.graph import GraphGenerator
+from evaluation.dispatching import SurveillanceObjectDispatcher
+from evaluation.objects import SurveillanceObject, generate_average_speeds
+from evaluation.transition import TransitionGenerator
+from evaluation.surveillance import BaseSurveillanceSystem
+from evaluation.surveillance_advanced import SpatioTemporalSurveillance
+from evaluation.scheduling import EventScheduler
+
+
+def run_experiment(events, seed, size, objects_count, targets, alpha, speed, train_limit, inference_limit):
+  random.seed(seed)
+  np.random.seed(seed)
+
+  graph = GraphGenerator.create(size, min_weight=20, max_weight=100)
+  transitions = TransitionGenerator(size, min_group=2).get_samples(objects_count)
+  dispatcher = SurveillanceObjectDispatcher(graph, transitions=transitions, objects_count=objects_count)
+  dispatcher.reset()
+
+  speeds = generate_average_speeds(exp=speed, size=objects_count)
+  objects = [ SurveillanceObject(dispatcher, id=idx, average_speed=speeds[idx]) for idx in range(objects_count) ]
+  for s_object in objects:
+    dispatcher.on_domain_enter(s_object.snapshot, s_object.coordinates.domain, 0)
+
+  supervised_object_ids = list(range(targets))
+  reference = BaseSurveillanceSystem(graph, dispatcher.occupancy, supervised_object_ids=supervised_object_ids, alpha=alpha)
+  advanced = SpatioTemporalSurveillance(graph, dispatcher.occupancy, supervised_object_ids=supervised_object_ids, alpha=alpha)
+
+  def run(systems, limit):
+    timetick = 0
+    if events:
+      timetick = EventScheduler(objects).run(systems, timetick, limit)
+    while timetick < limit:
+      for system in systems:
+        system.on_timetick(timetick)
+      for s_object in objects:
+        s_object.on_timetick(timetick)
+      timetick += 1
+
+  advanced.set_training_mode(True)
+  run([ advanced ], train_limit)
+
+  dispatcher.reset()
+  for s_object in objects:
+    s_object.reset_state(0)
+    dispatcher.on_domain_enter(s_object.snapshot, s_object.coordinates.domain, 0)
+
+  advanced.set_training_mode(False)
+  run([ advanced, reference ], inference_limit)
+
+  return dispatcher.history, reference.history, advanced.history, reference.resource_statistic, advanced.resource_statistic
+
+
+def test_event_scheduling_matches_fixed_step():
+  options = dict(seed=3, size=6, objects_count=3, targets=2, alpha=1, speed=10, train_limit=300, inference_limit=100)
+  assert run_experiment(False, **options) == run_experiment(True, **options)
+
+
+# Nodes activated by a message in the middle of a tick read their frame on
+# the next tick, which must not be skipped
+def test_event_scheduling_runs_tick_after_activation():
+  options = dict(seed=19, size=10, objects_count=5, targets=5, alpha=0.7, speed=3, train_limit=200, inference_limit=120)
+  assert run_experiment(False, **options) == run_experiment(True, **options)
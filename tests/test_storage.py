@@ -0,0 +1,60 @@
+import os
+import pytest
+
+from primitives.graph import Graph, GraphInternalError
+from primitives.compact import CompactGraph
+from primitives.storage import is_graph_file, read_graph
+from evaluation.surveillance_advanced import EdgeWeightSet
+
+
+def test_graphs_are_pickled_by_default(tmp_path):
+  graph = Graph(2)
+  graph.add_edge(0, 1, weight=EdgeWeightSet(3, 0, 1))
+  filename = str(tmp_path / "graph.pkl")
+
+  graph.save_to_file(filename)
+
+  assert not is_graph_file(filename)
+  assert Graph.load(filename).get_node(0).get_weight(1).distance == 3
+
+  with pytest.raises(GraphInternalError):
+    graph.save_to_file(str(tmp_path / "graph.bin"), binary=True)
+
+
+def test_binary_round_trip(tmp_path):
+  graph = Graph(4)
+  graph.add_edge(0, 1, weight=2.5)
+  graph.add_edge(1, 3, weight=4)
+  graph.add_edge(2, 2, weight=0)
+  graph.delete_node(0)
+  filename = str(tmp_path / "graph.bin")
+
+  graph.save_to_file(filename, binary=True)
+  assert is_graph_file(filename)
+
+  mapped = CompactGraph.load(filename)
+  assert mapped.node_ids.tolist() == [ 1, 2, 3 ]
+  assert mapped.get_weight(0, 2) == 4
+  assert mapped.get_weight(1, 1) == 0
+
+  loaded = Graph.load(filename)
+  assert { node.id for node in loaded.nodes } == { 1, 2, 3 }
+  assert loaded.get_node(1).get_weight(3) == 4
+  assert loaded.contains_edge(2, 2)
+
+
+def test_truncated_file_is_rejected(tmp_path):
+  filename = str(tmp_path / "graph.bin")
+  CompactGraph.from_edges(3, [ 0, 1 ], [ 1, 2 ], [ 1, 2 ]).save_to_file(filename)
+
+  with open(filename, 'r+b') as output:
+    output.truncate(os.path.getsize(filename) - 8)
+
+  with pytest.raises(GraphInternalError):
+    read_graph(filename)
+
+  other = tmp_path / "other.bin"
+  other.write_bytes(b'not a graph file')
+  assert not is_graph_file(str(other))
+  with pytest.raises(GraphInternalError):
+    read_graph(str(other))
@@ -0,0 +1,22 @@
+from primitives.graph import Graph
+from evaluation.dispatching import DomainOccupancy
+from evaluation.surveillance import SimpleSurveillanceNode, SurveillanceDispatcher
+
+
+def test_node_timetick_matches_batch():
+  occupancy = DomainOccupancy(Graph(3))
+  occupancy.enter(0, 1)
+  occupancy.enter(1, 2)
+  domain_graph = Graph(3)
+
+  single = SurveillanceDispatcher([ 0, 1 ], occupancy=occupancy)
+  node = SimpleSurveillanceNode(0, single)
+  node.set_observed_domain(domain_graph.get_node(1), occupancy)
+  node.on_timetick(5)
+  node.on_timetick(6)
+
+  batch = SurveillanceDispatcher([ 0, 1 ], occupancy=occupancy)
+  batch.on_process_all_frames([ (0, 1) ], [ 5, 6 ])
+
+  assert single.history == batch.history == { 0: [ (1, 5), (1, 6) ], 1: [] }
+  assert node.resource_statistic == { "Frames processed": 2 }
@@ -0,0 +1,25 @@
+import numpy as np
+
+from primitives.graph import GraphGenerator
+from primitives.metrics.paths import find_paths, get_direct_route_distances, get_shortest_of_paths
+from evaluation.surveillance_advanced import filter_direct_routes
+
+
+# Distances of the restricted searches against the enumerate-and-filter
+# construction they replace
+def test_direct_route_distances_match_filtered_paths():
+  np.random.seed(6)
+  graph = GraphGenerator.create(9, average_degree=3)
+  via_nodes = { 1, 2, 3, 4, 5 }
+
+  for src in via_nodes:
+    distances = get_direct_route_distances(graph, src, via_nodes)
+
+    for dest in via_nodes - { src }:
+      routes = filter_direct_routes(find_paths(graph, src, dest), src, dest, via_nodes)
+      expected = get_shortest_of_paths(graph, routes)
+
+      if expected is None:
+        assert dest not in distances
+      else:
+        assert distances[dest] == expected
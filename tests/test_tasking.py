@@ -0,0 +1,36 @@
+from primitives.graph import Graph
+from evaluation.coordinate import Coordinates
+from evaluation.dispatching import DispatchingInfo
+from evaluation.tasking import TaskGenerator, TaskType
+from evaluation.transition import TransitionMatrix
+
+
+def draw_tasks(count, **options):
+  transitions = [ TransitionMatrix.from_array([ 2, 5, 7 ], [ [ 0, 0.5, 0.5 ], [ 0.2, 0, 0.8 ], [ 1, 0, 0 ] ]) ]
+  generator = TaskGenerator(Graph(8), transitions, **options)
+  snapshot = DispatchingInfo(0, Coordinates(5))
+
+  tasks = []
+  for timetick in range(count):
+    task = generator.create_task(snapshot, timetick)
+    tasks.append((task.category, task.destination.domain if task.category == TaskType.MOVE else task.timeout))
+  return tasks
+
+
+def test_seeded_tasks_are_reproducible_across_refills():
+  tasks = draw_tasks(50, seed=4, pool_size=7)
+
+  assert len(tasks) == 50
+  assert tasks == draw_tasks(50, seed=4, pool_size=7)
+  assert tasks != draw_tasks(50, seed=5, pool_size=7)
+  assert { category for category, _ in tasks } == { TaskType.WAIT, TaskType.MOVE }
+
+
+def test_moving_degree_and_ranges():
+  moves = draw_tasks(200, seed=1, moving_degree=1)
+  waits = draw_tasks(200, seed=1, moving_degree=0, max_await=3)
+
+  assert all(category == TaskType.MOVE for category, _ in moves)
+  assert { destination for _, destination in moves } == { 2, 7 }
+  assert all(category == TaskType.WAIT for category, _ in waits)
+  assert { timeout for _, timeout in waits } == { 1, 2, 3 }
@@ -0,0 +1,86 @@
+import random
+import numpy as np
+import pytest
+from evaluation.transition import TransitionGenerator, TransitionMatrix, TransitionMatrixPool, TransitionError, GroupType
+
+
+def test_empty_group_gives_empty_matrix():
+  random.seed(1)
+  np.random.seed(1)
+
+  matrices = TransitionGenerator(10, group_gen_type=GroupType.BINOMIAL, group_p=0.1).get_samples(8)
+  empty = [ matrix for matrix in matrices if matrix.size == 0 ]
+
+  assert len(matrices) == 8
+  assert len(empty) > 0
+  assert empty[0].frozen
+  assert empty[0].possible_destinations == []
+  assert empty[0].sample_destination(3, 0.5) == 3
+  assert empty[0].sample_destinations([ 1, 2 ], [ 0.1, 0.9 ]).tolist() == [ 1, 2 ]
+
+
+def test_from_empty_array():
+  matrix = TransitionMatrix.from_array([], [])
+  assert matrix.matrix.shape == (0, 0)
+
+
+def frequencies(matrix, src, points):
+  destinations = matrix.sample_destinations([ src ] * len(points), points).tolist()
+  return { key: destinations.count(key) / len(points) for key in matrix.keys }
+
+
+def test_alias_sampling_follows_the_rows():
+  keys = [ 4, 1, 9 ]
+  rows = [ [ 0.1, 0.6, 0.3 ], [ 0, 0, 1 ], [ 0.5, 0.25, 0.25 ] ]
+  matrix = TransitionMatrix.from_array(keys, rows).finalize()
+  points = (np.arange(30000) + 0.5) / 30000
+
+  for src, row in zip(keys, rows):
+    observed = frequencies(matrix, src, points)
+    for key, probability in zip(keys, row):
+      assert abs(observed[key] - probability) < 1e-3
+
+  # sources outside of the group move along the mean row
+  observed = frequencies(matrix, 7, points)
+  for key, probability in zip(keys, np.mean(rows, axis=0).tolist()):
+    assert abs(observed[key] - probability) < 1e-3
+
+  assert [ matrix.sample_destination(1, point) for point in points[::97].tolist() ] == matrix.sample_destinations([ 1 ] * len(points[::97]), points[::97]).tolist()
+
+
+def test_sampling_sees_updated_probabilities():
+  matrix = TransitionMatrix.from_array([ 0, 1 ], [ [ 1, 0 ], [ 0, 1 ] ])
+  assert matrix.sample_destination(0, 0.9) == 0
+
+  matrix.set_transition_probability(0, 0, 0).set_transition_probability(0, 1, 1)
+  assert matrix.sample_destination(0, 0.1) == 1
+
+  matrix.set_transition_probability(0, 1, 0.5)
+  with pytest.raises(TransitionError):
+    matrix.sample_destination(0, 0.1)
+
+
+def test_pool_shares_equal_matrices():
+  pool = TransitionMatrixPool()
+  first = pool.intern(TransitionMatrix.from_array([ 3, 8 ], [ [ 0.2, 0.8 ], [ 1, 0 ] ]))
+  reordered = pool.intern(TransitionMatrix.from_array([ 8, 3 ], [ [ 0, 1 ], [ 0.8, 0.2 ] ]))
+  other = pool.intern(TransitionMatrix.from_array([ 3, 8 ], [ [ 0.5, 0.5 ], [ 1, 0 ] ]))
+
+  assert reordered is first
+  assert other is not first
+  assert len(pool) == 2
+  assert first.frozen
+  with pytest.raises(TransitionError):
+    first.set_transition_probability(3, 8, 0.5)
+
+
+def test_generated_matrices_are_interned():
+  random.seed(2)
+  np.random.seed(2)
+
+  generator = TransitionGenerator(6, min_group=6)
+  matrices = generator.get_samples(20)
+
+  assert len(generator.pool) == 1
+  assert all(matrix is matrices[0] for matrix in matrices)
+  assert matrices[0].frozen
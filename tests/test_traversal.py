@@ -0,0 +1,68 @@
+from collections import deque
+import numpy as np
+
+from primitives.graph import Graph, GraphGenerator
+from primitives.compact import CompactGraph
+from primitives.metrics.traversal import breadth_first_search, connected_components, depth_first_search, hop_distances, is_connected
+
+
+def queue_bfs(graph, src_id):
+  hops = { src_id: 0 }
+  queue = deque([ src_id ])
+  while len(queue) > 0:
+    node_id = queue.popleft()
+    for adjacent_id in sorted(node.id for node in graph.adjacent_nodes(node_id)):
+      if adjacent_id not in hops:
+        hops[adjacent_id] = hops[node_id] + 1
+        queue.append(adjacent_id)
+  return hops
+
+
+def test_bfs_matches_a_queue_bfs():
+  np.random.seed(11)
+  graph = GraphGenerator.create(80, presets=('weighted',), average_degree=2)
+  order, parent, hops = breadth_first_search(graph, 0)
+  expected = queue_bfs(graph, 0)
+
+  assert order.tolist() == list(expected.keys())
+  assert { node_id: hops[node_id] for node_id in expected } == expected
+  assert all(hops[node_id] == -1 and parent[node_id] == -1 for node_id in range(80) if node_id not in expected)
+  for node_id in order.tolist()[1:]:
+    assert graph.contains_edge(parent[node_id], node_id)
+    assert hops[parent[node_id]] == hops[node_id] - 1
+
+
+def test_traversals_report_node_ids_of_graphs_with_gaps():
+  graph = Graph(6)
+  graph.add_edge(0, 1, weight=1)
+  graph.add_edge(1, 2, weight=1)
+  graph.add_edge(2, 5, weight=1)
+  graph.add_edge(3, 4, weight=1)
+  graph.delete_node(2)
+
+  order, parent, hops = breadth_first_search(graph, [ 0, 3 ])
+  assert order.tolist() == [ 0, 3, 1, 4, 5 ]
+  assert parent.tolist() == [ -1, 0, -1, 3, 1 ]
+  assert hops.tolist() == hop_distances(graph, [ 0, 3 ]).tolist() == [ 0, 1, 0, 1, 2 ]
+
+  order, parent = depth_first_search(graph)
+  assert order.tolist() == [ 0, 1, 5, 3, 4 ]
+  assert parent.tolist() == [ -1, 0, -1, 3, 1 ]
+
+
+def test_dfs_preorder():
+  compact = CompactGraph.from_edges(6, [ 0, 0, 1, 2, 4 ], [ 1, 2, 3, 3, 5 ])
+
+  order, parent = depth_first_search(compact, 0)
+  assert order.tolist() == [ 0, 1, 3, 2 ]
+  assert parent.tolist() == [ -1, 0, 3, 1, -1, -1 ]
+
+
+def test_connected_components():
+  compact = CompactGraph.from_edges(7, [ 5, 1, 3, 6 ], [ 1, 0, 6, 6 ])
+  labels, count = connected_components(compact)
+
+  assert count == 4
+  assert labels.tolist() == [ 0, 0, 1, 2, 3, 0, 2 ]
+  assert not is_connected(compact)
+  assert is_connected(GraphGenerator.create_grid(30, compact=True))